@@ -1,22 +1,1400 @@
 # ruscat_os.py
 import tkinter as tk
+import tkinter.font
 from tkinter import messagebox, simpledialog, ttk
 import subprocess
 import sys
 import os
 import random
+import math
 import time
 import json
 from datetime import datetime
 import hashlib
 import threading
+import bisect
+import atexit
+import glob
+import zlib
+import heapq
+import itertools
+import traceback
+import contextlib
+import ctypes
+import ctypes.util
+import select
+import struct
+import stat
+import re
+import codecs
+import signal
+import http.server
+from collections import OrderedDict
+from collections import deque
 
-class NetworkManager:
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+try:
+    import pty
+    import termios
+except ImportError:
+    pty = None
+
+class EventLog:
+    def __init__(self, directory="ruscat_logs", max_bytes=5 * 1024 * 1024, rotate_seconds=3600,
+                 max_files=10, bucket_seconds=60, max_pending=100000):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.max_files = max_files
+        self.bucket_seconds = bucket_seconds
+        self.max_pending = max_pending
+        self.pending = deque()
+        self.dropped = 0
+        self.written = 0
+        self.write_errors = 0
+        self.index = {}
+        self.indexed = {}
+        self.owned = set()
+        self.current_path = None
+        self.current_file = None
+        self.current_opened = 0
+        self.sequence = 0
+        self.write_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.writer = None
+
+    def log(self, event, user=None, **fields):
+        """Queue an event; never blocks the caller"""
+        if len(self.pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        self.pending.append((time.time(), event, user, fields))
+        if len(self.pending) == 4096:
+            self.wakeup.set()
+        if self.writer is None:
+            self.start()
+
+    def start(self):
+        """Start the background writer"""
+        if self.writer is None:
+            self.writer = threading.Thread(target=self._run, daemon=True)
+            self.writer.start()
+            atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self.wakeup.wait(0.25)
+            self.wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                self.write_errors += 1
+
+    def flush(self):
+        """Write every queued event, one write call per batch; a failed batch is counted and dropped"""
+        with self.write_lock:
+            while self.pending:
+                lines = []
+                try:
+                    self._rotate_if_needed()
+                    entries = []
+                    offset = self.current_file.tell()
+                    while self.pending and offset < self.max_bytes:
+                        ts, event, user, fields = self.pending.popleft()
+                        record = {'ts': ts, 'event': event}
+                        if user is not None:
+                            record['user'] = user
+                            entries.append((user, ts, offset))
+                        record.update(fields)
+                        line = json.dumps(record, default=str) + "\n"
+                        offset += len(line.encode())
+                        lines.append(line)
+                    self.current_file.write("".join(lines))
+                    self.current_file.flush()
+                except OSError:
+                    self.write_errors += 1
+                    self.dropped += len(lines)
+                    self._close_current()
+                    return
+                for user, ts, entry_offset in entries:
+                    self._index_entry(user, ts, self.current_path, entry_offset)
+                self.indexed[self.current_path] = offset
+                self.written += len(lines)
+
+    def _close_current(self):
+        if self.current_file is not None:
+            try:
+                self.current_file.close()
+            except OSError:
+                pass
+        self.current_file = None
+
+    def _index_entry(self, user, ts, path, offset):
+        buckets = self.index.setdefault(user, {})
+        buckets.setdefault(int(ts // self.bucket_seconds), []).append((path, offset))
+
+    def _index_files(self):
+        """Index lines appended to log files by earlier runs or other instances since the last look"""
+        for path in glob.glob(os.path.join(self.directory, "events-*.jsonl")):
+            if path == self.current_path:
+                continue
+            start = self.indexed.get(path, 0)
+            try:
+                if os.path.getsize(path) <= start:
+                    continue
+                with open(path, 'rb') as handle:
+                    handle.seek(start)
+                    offset = start
+                    for line in handle:
+                        if not line.endswith(b"\n"):
+                            break
+                        try:
+                            record = json.loads(line)
+                            user, ts = record.get('user'), float(record['ts'])
+                        except (ValueError, KeyError, TypeError, AttributeError):
+                            user = None
+                        if user is not None:
+                            self._index_entry(user, ts, path, offset)
+                        offset += len(line)
+            except OSError:
+                continue
+            self.indexed[path] = offset
+
+    def _forget(self, paths):
+        for path in paths:
+            self.indexed.pop(path, None)
+            self.owned.discard(path)
+        for buckets in self.index.values():
+            for bucket in list(buckets):
+                buckets[bucket] = [entry for entry in buckets[bucket] if entry[0] not in paths]
+                if not buckets[bucket]:
+                    del buckets[bucket]
+
+    def _rotate_if_needed(self):
+        now = time.time()
+        if self.current_file is not None:
+            if self.current_file.tell() < self.max_bytes and now - self.current_opened < self.rotate_seconds:
+                return
+            self._close_current()
+        os.makedirs(self.directory, exist_ok=True)
+        if not self.owned:
+            self._index_files()
+        while True:
+            self.sequence += 1
+            self.current_path = os.path.join(
+                self.directory, f"events-{int(now * 1000)}-{os.getpid()}-{self.sequence:06d}.jsonl")
+            if not os.path.exists(self.current_path):
+                break
+        # newline='' keeps "\n" on every platform, so recorded offsets match the bytes on disk
+        self.current_file = open(self.current_path, 'a', encoding='utf-8', newline='')
+        self.current_opened = now
+        self.owned.add(self.current_path)
+
+        # Another instance may still be appending to its own recent files; leave those alone
+        removed = set()
+        for path in sorted(glob.glob(os.path.join(self.directory, "events-*.jsonl")))[:-self.max_files]:
+            try:
+                if path not in self.owned and now - os.path.getmtime(path) < self.rotate_seconds:
+                    continue
+                os.remove(path)
+            except OSError:
+                continue
+            removed.add(path)
+        if removed:
+            self._forget(removed)
+
+    def events_for_user(self, user, start=None, end=None):
+        """Events for user between start and end (epoch seconds), using the time-bucket index"""
+        self.flush()
+        start = start if start is not None else 0
+        end = end if end is not None else time.time()
+        first, last = int(start // self.bucket_seconds), int(end // self.bucket_seconds)
+        with self.write_lock:
+            self._index_files()
+            buckets = self.index.get(user, {})
+            locations = []
+            for bucket in sorted(b for b in buckets if first <= b <= last):
+                locations.extend(buckets[bucket])
+
+        events = []
+        handles = {}
+        try:
+            for path, offset in locations:
+                if path not in handles:
+                    try:
+                        handles[path] = open(path, 'rb')
+                    except OSError:
+                        handles[path] = None
+                handle = handles[path]
+                if handle is None:
+                    continue
+                handle.seek(offset)
+                record = json.loads(handle.readline())
+                if start <= record['ts'] <= end:
+                    events.append(record)
+        finally:
+            for handle in handles.values():
+                if handle is not None:
+                    handle.close()
+        events.sort(key=lambda record: record['ts'])
+        return events
+
+event_log = EventLog()
+
+class Metric:
+    def __init__(self, registry, kind, name, help_text, label_names=(), label_values=(), buckets=None):
+        self.registry = registry
+        self.kind = kind
+        self.name = name
+        self.help = help_text
+        self.label_names = label_names
+        self.label_values = label_values
+        self.buckets = buckets
+        self.children = {}
+        self.function = None
+
+    def labels(self, *values):
+        """Child series for these label values; keep it around on hot paths"""
+        child = self.children.get(values)
+        if child is None:
+            with self.registry.lock:
+                child = self.children.get(values)
+                if child is None:
+                    child = Metric(self.registry, self.kind, self.name, self.help,
+                                   self.label_names, tuple(str(value) for value in values), self.buckets)
+                    self.children[values] = child
+        return child
+
+    def inc(self, amount=1):
+        shard = self.registry.shard()
+        shard[self] = shard.get(self, 0) + amount
+
+    def set(self, value):
+        self.registry.gauge_values[self] = value
+
+    def set_function(self, function):
+        """Gauge read at collection time; must be safe to call from any thread"""
+        self.function = function
+
+    def observe(self, value):
+        shard = self.registry.shard()
+        state = shard.get(self)
+        if state is None:
+            # One count per bucket plus +Inf, then sum and count
+            state = shard[self] = [0] * (len(self.buckets) + 3)
+        state[bisect.bisect_left(self.buckets, value)] += 1
+        state[-2] += value
+        state[-1] += 1
+
+    @contextlib.contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+class MetricsRegistry:
+    DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, prefix="ruscat_"):
+        self.prefix = prefix
+        self.families = OrderedDict()
+        self.shards = []
+        self.local = threading.local()
+        self.gauge_values = {}
+        self.lock = threading.Lock()
+        self.server = None
+
+    def shard(self):
+        """This thread's private value map, so updates never take a lock"""
+        try:
+            return self.local.shard
+        except AttributeError:
+            shard = self.local.shard = {}
+            self.shards.append(shard)
+            return shard
+
+    def _register(self, kind, name, help_text, labels, buckets=None):
+        name = self.prefix + name
+        with self.lock:
+            metric = self.families.get(name)
+            if metric is None:
+                metric = self.families[name] = Metric(self, kind, name, help_text, tuple(labels), buckets=buckets)
+            elif metric.kind != kind:
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._register('counter', name, help_text, labels)
+
+    def gauge(self, name, help_text, labels=()):
+        return self._register('gauge', name, help_text, labels)
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register('histogram', name, help_text, labels, tuple(sorted(buckets)))
+
+    def _collect(self):
+        """Merge every thread's shard into one value per series"""
+        totals = {}
+        for shard in list(self.shards):
+            for metric, value in dict(shard).items():
+                if metric.kind == 'histogram':
+                    state = totals.get(metric)
+                    if state is None:
+                        totals[metric] = list(value)
+                    else:
+                        for index, count in enumerate(value):
+                            state[index] += count
+                else:
+                    totals[metric] = totals.get(metric, 0) + value
+        totals.update(self.gauge_values)
+        for family in list(self.families.values()):
+            for metric in [family] + list(family.children.values()):
+                if metric.function is not None:
+                    try:
+                        totals[metric] = metric.function()
+                    except Exception:
+                        pass
+        return totals
+
+    def _series(self):
+        totals = self._collect()
+        for family in list(self.families.values()):
+            members = list(family.children.values()) if family.label_names else [family]
+            yield family, [(metric, totals[metric]) for metric in members if metric in totals]
+
+    @staticmethod
+    def _label_text(names, values, extra=None):
+        pairs = list(zip(names, values))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        escaped = [(name, value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for name, value in pairs]
+        return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+    def exposition(self):
+        """Every series in Prometheus text format 0.0.4"""
+        lines = []
+        for family, series in self._series():
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for metric, value in series:
+                if metric.kind != 'histogram':
+                    lines.append(f"{family.name}{self._label_text(metric.label_names, metric.label_values)} {value}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (float('inf'),), value):
+                    cumulative += count
+                    le = ('le', "+Inf" if bound == float('inf') else repr(bound))
+                    lines.append(f"{family.name}_bucket{self._label_text(metric.label_names, metric.label_values, le)} {cumulative}")
+                labels = self._label_text(metric.label_names, metric.label_values)
+                lines.append(f"{family.name}_sum{labels} {value[-2]}")
+                lines.append(f"{family.name}_count{labels} {value[-1]}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _quantile(buckets, state, percent):
+        """Upper bound of the bucket holding the given percentile"""
+        target = state[-1] * percent / 100.0
+        seen = 0
+        for bound, count in zip(buckets + (float('inf'),), state):
+            seen += count
+            if seen >= target:
+                return bound
+        return float('inf')
+
+    def snapshot(self):
+        """Current values keyed by series name, with p50/p99 estimates for histograms"""
+        result = {}
+        for family, series in self._series():
+            for metric, value in series:
+                key = family.name + self._label_text(metric.label_names, metric.label_values)
+                if metric.kind == 'histogram':
+                    result[key] = {
+                        'count': value[-1],
+                        'sum': value[-2],
+                        'p50': self._quantile(metric.buckets, value, 50) if value[-1] else 0.0,
+                        'p99': self._quantile(metric.buckets, value, 99) if value[-1] else 0.0
+                    }
+                else:
+                    result[key] = value
+        return result
+
+    def serve(self, port, host="127.0.0.1"):
+        """Expose /metrics (Prometheus text) and /snapshot (JSON) on a local port"""
+        if self.server:
+            return False, f"Metrics already served on port {self.server.server_address[1]}"
+        registry = self
+
+        class MetricsHandler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?')[0]
+                if path == '/metrics':
+                    body = registry.exposition().encode()
+                    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+                elif path == '/snapshot':
+                    body = json.dumps(registry.snapshot(), default=str).encode()
+                    content_type = 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self.server = http.server.ThreadingHTTPServer((host, port), MetricsHandler)
+        except OSError as e:
+            return False, f"Failed to serve metrics: {e}"
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name="metrics-http", daemon=True).start()
+        return True, f"Metrics on http://{host}:{self.server.server_address[1]}/metrics"
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+metrics = MetricsRegistry()
+
+class CanSignal:
+    def __init__(self, name, start_bit, length, big_endian=False, signed=False, scale=1.0, offset=0.0, unit=""):
+        self.name = name
+        self.start_bit = start_bit
+        self.length = length
+        self.big_endian = big_endian
+        self.signed = signed
+        self.scale = scale
+        self.offset = offset
+        self.unit = unit
+
+    def shift(self):
+        """Bit position of the signal's LSB in the 64-bit payload integer"""
+        if self.big_endian:
+            # DBC Motorola start bit names the MSB in sawtooth numbering
+            msb = (7 - self.start_bit // 8) * 8 + self.start_bit % 8
+            return msb - self.length + 1
+        return self.start_bit
+
+class CanSignalDatabase:
+    def __init__(self):
+        self.messages = {}
+        self.decoders = {}
+
+    @classmethod
+    def default(cls):
+        """Signals for the simulated ECUs"""
+        database = cls()
+        database.add_message(0x100, "EngineStatus", "CAN_001", [
+            CanSignal("RPM", 0, 16, scale=1.0, unit="rpm"),
+            CanSignal("CoolantTemp", 16, 8, offset=-40.0, unit="C"),
+            CanSignal("Throttle", 24, 8, scale=0.4, unit="%"),
+        ])
+        database.add_message(0x200, "TransmissionStatus", "CAN_002", [
+            CanSignal("Gear", 0, 4),
+            CanSignal("OilTemp", 8, 8, offset=-40.0, unit="C"),
+        ])
+        database.add_message(0x300, "BrakeStatus", "CAN_003", [
+            CanSignal("Pressure", 7, 12, big_endian=True, scale=0.1, unit="bar"),
+            CanSignal("WheelSlip", 16, 8, signed=True, unit="%"),
+        ])
+        return database
+
+    def add_message(self, arbitration_id, name, device, signals):
+        """Register a message layout; it is compiled on first decode"""
+        self.messages[arbitration_id] = {'name': name, 'device': device, 'signals': signals}
+        self.decoders.pop(arbitration_id, None)
+
+    def compile(self, arbitration_id):
+        """Precompute shift/mask/scale tuples for one message layout"""
+        decoder = self.decoders.get(arbitration_id)
+        if decoder is None:
+            decoder = [
+                (signal.name, signal.shift(), (1 << signal.length) - 1, signal.big_endian,
+                 (1 << (signal.length - 1)) if signal.signed else 0, signal.scale, signal.offset)
+                for signal in self.messages[arbitration_id]['signals']
+            ]
+            self.decoders[arbitration_id] = decoder
+        return decoder
+
+    def encode(self, arbitration_id, values):
+        """Pack physical values into an 8-byte payload"""
+        little = big = 0
+        for signal in self.messages[arbitration_id]['signals']:
+            raw = int(round((values.get(signal.name, signal.offset) - signal.offset) / signal.scale))
+            raw &= (1 << signal.length) - 1
+            if signal.big_endian:
+                big |= raw << signal.shift()
+            else:
+                little |= raw << signal.shift()
+        data = bytearray(little.to_bytes(8, 'little'))
+        for i, byte in enumerate(big.to_bytes(8, 'big')):
+            data[i] |= byte
+        return bytes(data)
+
+    def decode(self, arbitration_id, data):
+        """Decode one frame into {signal: physical value}"""
+        if arbitration_id not in self.messages:
+            return None
+        data = bytes(data).ljust(8, b'\0')[:8]
+        little = int.from_bytes(data, 'little')
+        big = int.from_bytes(data, 'big')
+        values = {}
+        for name, shift, mask, big_endian, sign_bit, scale, offset in self.compile(arbitration_id):
+            raw = ((big if big_endian else little) >> shift) & mask
+            if sign_bit and raw & sign_bit:
+                raw -= mask + 1
+            values[name] = raw * scale + offset
+        return values
+
+    def decode_batch(self, ids, payloads):
+        """Decode many frames into per-message signal columns.
+
+        ids is a sequence of arbitration IDs and payloads the matching frames as
+        one bytes object of 8 bytes per frame. With NumPy each message is decoded
+        in one vectorized pass; otherwise it falls back to a per-frame loop.
+        """
+        if np is None:
+            return self._decode_batch_python(ids, payloads)
+
+        ids = np.asarray(ids)
+        frames = np.frombuffer(payloads, dtype=np.uint8).reshape(-1, 8)
+        little = frames.view('<u8').ravel()
+        big = frames.view('>u8').ravel().astype(np.uint64)
+        results = {}
+        for arbitration_id in np.unique(ids):
+            arbitration_id = int(arbitration_id)
+            if arbitration_id not in self.messages:
+                continue
+            rows = np.flatnonzero(ids == arbitration_id)
+            columns = {}
+            for name, shift, mask, big_endian, sign_bit, scale, offset in self.compile(arbitration_id):
+                source = big[rows] if big_endian else little[rows]
+                raw = ((source >> np.uint64(shift)) & np.uint64(mask)).astype(np.int64)
+                if sign_bit:
+                    raw = np.where(raw & sign_bit, raw - (mask + 1), raw)
+                columns[name] = raw * scale + offset
+            results[arbitration_id] = {'name': self.messages[arbitration_id]['name'], 'rows': rows, 'signals': columns}
+        return results
+
+    def _decode_batch_python(self, ids, payloads):
+        results = {}
+        for row, arbitration_id in enumerate(ids):
+            arbitration_id = int(arbitration_id)
+            if arbitration_id not in self.messages:
+                continue
+            values = self.decode(arbitration_id, payloads[row * 8:row * 8 + 8])
+            entry = results.get(arbitration_id)
+            if entry is None:
+                entry = results[arbitration_id] = {
+                    'name': self.messages[arbitration_id]['name'], 'rows': [],
+                    'signals': {name: [] for name in values}
+                }
+            entry['rows'].append(row)
+            for name, value in values.items():
+                entry['signals'][name].append(value)
+        return results
+
+class CanFilter:
+    EXTENDED_MASK = 0x1FFFFFFF
+
+    def __init__(self, rules=()):
+        self.rules = []
+        for kind, first, second, inverted in rules:
+            self.add_rule(kind, first, second, inverted, recompile=False)
+        self.compile()
+
+    @classmethod
+    def parse(cls, text):
+        """Parse rules such as "0x100, 0x200-0x2FF, 0x300/0x700, !0x555".
+
+        A plain ID matches exactly, "lo-hi" is an inclusive range and "id/mask"
+        matches like a SocketCAN filter. A leading "!" turns the rule into a
+        reject rule. Raises ValueError on malformed input.
+        """
+        rules = []
+        for token in text.replace(',', ' ').split():
+            inverted = token.startswith('!')
+            token = token.lstrip('!')
+            if '/' in token:
+                can_id, mask = token.split('/', 1)
+                rules.append(('mask', int(can_id, 0), int(mask, 0), inverted))
+            elif '-' in token:
+                low, high = token.split('-', 1)
+                rules.append(('range', int(low, 0), int(high, 0), inverted))
+            else:
+                rules.append(('mask', int(token, 0), cls.EXTENDED_MASK, inverted))
+        return cls(rules)
+
+    def add_rule(self, kind, first, second, inverted=False, recompile=True):
+        if kind not in ('mask', 'range'):
+            raise ValueError(f"Unknown filter rule: {kind}")
+        self.rules.append((kind, first, second, inverted))
+        if recompile:
+            self.compile()
+
+    def compile(self):
+        """Split rules into exact-ID sets, per-mask tables and sorted ranges"""
+        self.compiled = {False: self._compile_group(False), True: self._compile_group(True)}
+        self.has_accept_rules = any(not rule[3] for rule in self.rules)
+        self.cache = {}
+
+    def _compile_group(self, inverted):
+        exact = set()
+        masks = {}
+        ranges = []
+        for kind, first, second, rule_inverted in self.rules:
+            if rule_inverted != inverted:
+                continue
+            if kind == 'range':
+                ranges.append((min(first, second), max(first, second)))
+            elif second == self.EXTENDED_MASK:
+                exact.add(first)
+            else:
+                masks.setdefault(second, set()).add(first & second)
+        ranges.sort()
+        merged = []
+        for low, high in ranges:
+            if merged and low <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], high)
+            else:
+                merged.append([low, high])
+        return exact, masks, [low for low, high in merged], [high for low, high in merged]
+
+    def _matches(self, group, arbitration_id):
+        exact, masks, lows, highs = group
+        if arbitration_id in exact:
+            return True
+        for mask, values in masks.items():
+            if arbitration_id & mask in values:
+                return True
+        position = bisect.bisect_right(lows, arbitration_id) - 1
+        return position >= 0 and arbitration_id <= highs[position]
+
+    def accepts(self, arbitration_id):
+        """Accepted if any accept rule matches (or there are none) and no reject rule does"""
+        result = self.cache.get(arbitration_id)
+        if result is None:
+            if self.rules:
+                result = (not self.has_accept_rules or self._matches(self.compiled[False], arbitration_id)) \
+                    and not self._matches(self.compiled[True], arbitration_id)
+            else:
+                result = True
+            self.cache[arbitration_id] = result
+        return result
+
+class CanBusStats:
+    def __init__(self, bitrate=500000):
+        self.bitrate = bitrate
+        self.counters = {}
+        self.total_bits = 0
+        self.rejected = 0
+        self.bus_load = 0.0
+        self.lock = threading.Lock()
+        self.sample_time = time.monotonic()
+
+    def record(self, arbitration_id, dlc, timestamp):
+        """Count one frame; roughly 47 overhead bits plus the payload, ignoring bit stuffing"""
+        counter = self.counters.get(arbitration_id)
+        if counter is None:
+            counter = self.counters[arbitration_id] = {'count': 0, 'bits': 0, 'last_seen': timestamp,
+                                                       'sampled': 0, 'sampled_bits': 0}
+        bits = 47 + 8 * dlc
+        counter['count'] += 1
+        counter['bits'] += bits
+        counter['last_seen'] = timestamp
+        self.total_bits += bits
+
+    def snapshot(self):
+        """Per-ID rate and bus load since the previous snapshot, share of bits seen and last-seen age.
+
+        bus_load is the ID's bits per second over the bitrate; the total is
+        kept in self.bus_load.
+        """
+        with self.lock:
+            return self._snapshot()
+
+    def _snapshot(self):
+        now = time.monotonic()
+        elapsed = max(now - self.sample_time, 1e-9)
+        self.sample_time = now
+        capacity = self.bitrate * elapsed
+        rows = []
+        for arbitration_id, counter in sorted(self.counters.items()):
+            rows.append({
+                'id': arbitration_id,
+                'count': counter['count'],
+                'rate': (counter['count'] - counter['sampled']) / elapsed,
+                'bus_load': (counter['bits'] - counter['sampled_bits']) / capacity,
+                'load_share': counter['bits'] / self.total_bits if self.total_bits else 0.0,
+                'age': now - counter['last_seen']
+            })
+            counter['sampled'] = counter['count']
+            counter['sampled_bits'] = counter['bits']
+        self.bus_load = sum(row['bus_load'] for row in rows)
+        return rows
+
+class LatencyHistogram:
+    SUB_BUCKET_BITS = 3
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        """Add a sample; buckets are powers of two in microseconds split into 8 linear steps"""
+        micros = max(0, int(seconds * 1000000))
+        # Keep SUB_BUCKET_BITS bits below the leading one, so the mantissa spans 8-15
+        shift = max(0, micros.bit_length() - self.SUB_BUCKET_BITS - 1)
+        key = (shift, micros >> shift)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, percent):
+        """Upper bound, in seconds, of the bucket holding the given percentile"""
+        if not self.count:
+            return 0.0
+        target = self.count * percent / 100.0
+        seen = 0
+        for shift, mantissa in sorted(self.counts, key=lambda key: key[1] << key[0]):
+            seen += self.counts[(shift, mantissa)]
+            if seen >= target:
+                return min(((mantissa + 1) << shift) / 1000000, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'p50': self.percentile(50),
+            'p99': self.percentile(99),
+            'max': self.max
+        }
+
+class CanTransmitScheduler:
+    def __init__(self, network_manager):
+        self.network_manager = network_manager
+        self.jobs = {}
+        self.heap = []
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+        self.thread = None
+        self.running = False
+
+    def start(self, key, device_id, payload, period):
+        """Send payload to device_id every period seconds; restarting a key replaces its schedule"""
+        if period <= 0:
+            raise ValueError("Period must be positive")
+        with self.condition:
+            job = self.jobs.get(key)
+            # Generations never repeat, so heap entries left by a stopped job can't match a new one
+            generation = next(self.sequence)
+            deadline = time.monotonic() + period
+            self.jobs[key] = {
+                'device': device_id, 'payload': payload, 'period': period, 'generation': generation,
+                'sent': 0, 'failed': 0, 'skipped': 0,
+                'jitter': job['jitter'] if job else LatencyHistogram()
+            }
+            heapq.heappush(self.heap, (deadline, next(self.sequence), key, generation))
+            self.condition.notify()
+            self.running = True
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+
+    def update_payload(self, key, payload):
+        """Change the payload of a running job without disturbing its deadlines"""
+        with self.condition:
+            if key not in self.jobs:
+                return False
+            self.jobs[key]['payload'] = payload
+            return True
+
+    def stop(self, key):
+        """Stop a job and return its statistics"""
+        with self.condition:
+            job = self.jobs.pop(key, None)
+            self.condition.notify()
+        return self._job_stats(job) if job else None
+
+    def stop_all(self):
+        with self.condition:
+            self.jobs.clear()
+            self.heap.clear()
+            self.running = False
+            self.condition.notify()
+
+    def _job_stats(self, job):
+        stats = job['jitter'].summary()
+        stats.update(device=job['device'], period=job['period'], sent=job['sent'],
+                     failed=job['failed'], skipped=job['skipped'])
+        return stats
+
+    def stats(self):
+        with self.condition:
+            return {key: self._job_stats(job) for key, job in self.jobs.items()}
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while self.running:
+                    while self.heap:
+                        job = self.jobs.get(self.heap[0][2])
+                        if job is not None and job['generation'] == self.heap[0][3]:
+                            break
+                        heapq.heappop(self.heap)
+                    if not self.heap:
+                        self.condition.wait()
+                        continue
+                    delay = self.heap[0][0] - time.monotonic()
+                    if delay <= 0:
+                        break
+                    self.condition.wait(delay)
+                if not self.running:
+                    return
+                deadline, _, key, generation = heapq.heappop(self.heap)
+                job = self.jobs[key]
+                device_id, payload, period = job['device'], job['payload'], job['period']
+
+            sent_at = time.monotonic()
+            success, _ = self.network_manager.send_can_message(device_id, payload)
+
+            with self.condition:
+                if self.jobs.get(key) is not job:
+                    continue
+                job['jitter'].record(sent_at - deadline)
+                job['sent' if success else 'failed'] += 1
+                # Next deadline follows the schedule, not the send time, so there is no drift
+                next_deadline = deadline + period
+                now = time.monotonic()
+                if next_deadline <= now:
+                    missed = int((now - next_deadline) // period) + 1
+                    job['skipped'] += missed
+                    next_deadline += missed * period
+                heapq.heappush(self.heap, (next_deadline, next(self.sequence), key, generation))
+
+class TkStallProfiler:
+    def __init__(self, stall_thresholds=(0.016, 0.1), max_stalls=200, max_trace_events=100000):
+        self.stall_thresholds = stall_thresholds
+        self.histograms = {}
+        self.stalls = deque(maxlen=max_stalls)
+        self.trace_events = deque(maxlen=max_trace_events)
+        self.active = []
+        self.samples = {}
+        self.sample_lock = threading.Lock()
+        self.installed = False
+        self.partial = False
+        self.started = time.perf_counter()
+        self.main_thread_id = threading.main_thread().ident
+        self.callback_seconds = metrics.histogram("ui_callback_seconds", "Tk callback duration while the profiler is on")
+        self.stall_counter = metrics.counter("ui_stalls_total", "Tk callbacks over a stall threshold", labels=('severity',))
+
+    def install(self):
+        """Wrap every Tk command, bind and after callback registered from now on.
+
+        tkinter binds CallWrapper(...).__call__ when a callback is registered,
+        so callbacks registered before install() are never timed. Installing
+        before the Tk root exists (RUSCAT_PROFILE_UI=1) covers everything.
+        """
+        if self.installed:
+            return
+        self.installed = True
+        self.partial = tk._default_root is not None
+        self.started = time.perf_counter()
+        original_call = tk.CallWrapper.__call__
+        profiler = self
+
+        def profiled_call(wrapper, *args):
+            return profiler.measure(profiler.callback_label(wrapper.func), original_call, wrapper, *args)
+
+        tk.CallWrapper.__call__ = profiled_call
+        threading.Thread(target=self._watchdog, daemon=True).start()
+        print("⏱️ UI stall profiler enabled")
+
+    @staticmethod
+    def callback_label(func):
+        """Readable name for a callback, looking through Tk's after() wrapper"""
+        qualname = getattr(func, '__qualname__', type(func).__name__)
+        if qualname.endswith('after.<locals>.callit') and func.__closure__:
+            for cell in func.__closure__:
+                if callable(cell.cell_contents):
+                    func = cell.cell_contents
+                    qualname = getattr(func, '__qualname__', type(func).__name__)
+                    break
+        code = getattr(func, '__code__', None)
+        if code is None:
+            return qualname
+        return f"{qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def measure(self, name, call, *args):
+        start = time.perf_counter()
+        token = (name, start)
+        self.active.append(token)
+        try:
+            return call(*args)
+        finally:
+            duration = time.perf_counter() - start
+            with self.sample_lock:
+                self.active.remove(token)
+                stacks = self.samples.pop(token, None)
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram()
+            histogram.record(duration)
+            self.trace_events.append({
+                'name': name, 'ph': 'X', 'pid': os.getpid(), 'tid': 0,
+                'ts': (start - self.started) * 1000000, 'dur': duration * 1000000
+            })
+            self.callback_seconds.observe(duration)
+            if duration >= self.stall_thresholds[0]:
+                severity = 'freeze' if duration >= self.stall_thresholds[-1] else 'stall'
+                self.stall_counter.labels(severity).inc()
+                self.stalls.append({'name': name, 'start': start, 'duration': duration,
+                                    'severity': severity, 'stacks': stacks or []})
+
+    def _watchdog(self):
+        """Sample the main thread's stack while a callback overruns a threshold"""
+        while True:
+            time.sleep(0.005)
+            self._sample()
+
+    def _sample(self):
+        with self.sample_lock:
+            if not self.active:
+                return
+            token = self.active[-1]
+            taken = len(self.samples.get(token, ()))
+        elapsed = time.perf_counter() - token[1]
+        if taken < len(self.stall_thresholds) and elapsed >= self.stall_thresholds[taken]:
+            frame = sys._current_frames().get(self.main_thread_id)
+            if frame is not None:
+                stack = "".join(traceback.format_stack(frame))
+                with self.sample_lock:
+                    # The callback may have finished while the stack was formatted
+                    if token in self.active:
+                        self.samples.setdefault(token, []).append({'after': elapsed, 'stack': stack})
+
+    def report(self, limit=20):
+        """Text summary: slowest callbacks by p99, then the most recent stalls"""
+        lines = []
+        if self.partial:
+            lines += ["Enabled after startup: callbacks registered earlier (taskbar, desktop, menus, hotkeys)",
+                      "are not timed. Start with RUSCAT_PROFILE_UI=1 for full coverage.", ""]
+        lines.append(f"{'Callback':60} {'calls':>7} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+        ranked = sorted(self.histograms.items(), key=lambda item: item[1].percentile(99), reverse=True)
+        for name, histogram in ranked[:limit]:
+            summary = histogram.summary()
+            lines.append(f"{name[:60]:60} {summary['count']:>7} {summary['p50'] * 1000:>8.2f} "
+                         f"{summary['p99'] * 1000:>8.2f} {summary['max'] * 1000:>8.2f}")
+        lines.append("")
+        lines.append(f"Stalls (>= {self.stall_thresholds[0] * 1000:.0f} ms): {len(self.stalls)}")
+        for stall in list(self.stalls)[-limit:]:
+            lines.append(f"  [{stall['severity']}] {stall['name']} {stall['duration'] * 1000:.1f} ms")
+            if stall['stacks']:
+                frames = [line.strip() for line in stall['stacks'][-1]['stack'].splitlines() if line.strip().startswith('File ')]
+                lines.append("    at " + frames[-1])
+        return "\n".join(lines)
+
+    def export_chrome_trace(self, path):
+        """Write callbacks and stall markers in Chrome trace-event format"""
+        events = list(self.trace_events)
+        for stall in self.stalls:
+            events.append({'name': f"{stall['severity']}: {stall['name']}", 'ph': 'i', 's': 'g',
+                           'pid': os.getpid(), 'tid': 0, 'ts': (stall['start'] - self.started) * 1000000,
+                           'args': {'duration_ms': stall['duration'] * 1000,
+                                    'stacks': [sample['stack'] for sample in stall['stacks']]}})
+        try:
+            with open(path, 'w') as f:
+                json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+            return True, f"Trace written to {path}"
+        except OSError as e:
+            return False, f"Failed to write trace: {e}"
+
+ui_profiler = TkStallProfiler()
+
+class VirtualCanBus:
     def __init__(self):
+        self.endpoints = []
+        self.lock = threading.Lock()
+
+    def open(self):
+        """Attach a new endpoint; every endpoint sees frames sent by the others"""
+        endpoint = VirtualCanEndpoint(self)
+        with self.lock:
+            self.endpoints.append(endpoint)
+        return endpoint
+
+    def deliver(self, sender, arbitration_id, data):
+        with self.lock:
+            endpoints = list(self.endpoints)
+        for endpoint in endpoints:
+            if endpoint is not sender:
+                endpoint.inbox.append((arbitration_id, bytes(data)))
+                endpoint.ready.set()
+
+class VirtualCanEndpoint:
+    def __init__(self, bus):
+        self.bus = bus
+        self.inbox = deque()
+        self.ready = threading.Event()
+
+    def send(self, arbitration_id, data):
+        self.bus.deliver(self, arbitration_id, data)
+
+    def recv(self, timeout=None):
+        """Next (id, data) frame, or None on timeout"""
+        if not self.inbox:
+            self.ready.clear()
+            if not self.inbox and not self.ready.wait(timeout):
+                return None
+        try:
+            return self.inbox.popleft()
+        except IndexError:
+            return None
+
+class BoundedFrameQueue:
+    POLICIES = ('drop-oldest', 'drop-newest', 'block')
+
+    def __init__(self, capacity=10000, policy='drop-oldest'):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown backpressure policy: {policy}")
+        self.capacity = capacity
+        self.policy = policy
+        self.frames = deque()
+        self.dropped = 0
+        self.not_full = threading.Condition()
+
+    def put(self, frame, timeout=None):
+        """Enqueue a frame; returns False if a frame was dropped to make it fit"""
+        if len(self.frames) < self.capacity:
+            self.frames.append(frame)
+            return True
+        if self.policy == 'drop-newest':
+            self.dropped += 1
+            return False
+        if self.policy == 'drop-oldest':
+            try:
+                self.frames.popleft()
+            except IndexError:
+                pass
+            self.dropped += 1
+            self.frames.append(frame)
+            return False
+        with self.not_full:
+            if not self.not_full.wait_for(lambda: len(self.frames) < self.capacity, timeout):
+                self.dropped += 1
+                return False
+        self.frames.append(frame)
+        return True
+
+    def drain(self, limit=None):
+        """Remove and return up to limit frames in arrival order"""
+        frames = []
+        popleft = self.frames.popleft
+        count = len(self.frames) if limit is None else min(limit, len(self.frames))
+        for _ in range(count):
+            frames.append(popleft())
+        if frames and self.policy == 'block':
+            with self.not_full:
+                self.not_full.notify_all()
+        return frames
+
+class CanChannel:
+    def __init__(self, name, endpoint, capacity=10000, policy='drop-oldest', ready=None, registry=None):
+        registry = metrics if registry is None else registry
+        self.name = name
+        self.endpoint = endpoint
+        self.ready = ready
+        self.queue = BoundedFrameQueue(capacity, policy)
+        self.received = 0
+        self.inflight = None
+        self.received_counter = registry.counter("can_channel_frames_total", "Frames read from a CAN channel", labels=('channel',)).labels(name)
+        self.queue_depth = registry.gauge("can_channel_queue_depth", "Frames waiting in a CAN channel queue", labels=('channel',)).labels(name)
+        self.queue_depth.set_function(lambda: len(self.queue.frames))
+        self.running = True
+        self.thread = threading.Thread(target=self._read, name=f"can-{name}", daemon=True)
+        self.thread.start()
+
+    def _read(self):
+        """Reader thread: timestamp frames and hand them to the bounded queue"""
+        while self.running:
+            frame = self.endpoint.recv(timeout=0.1)
+            if frame is None:
+                continue
+            self.received += 1
+            self.received_counter.inc()
+            # Published before the timestamp is taken, so a concurrent drain
+            # knows no frame older than this is still on its way
+            self.inflight = time.monotonic()
+            self.queue.put((time.monotonic(), frame[0], frame[1], self.name))
+            self.inflight = None
+            if self.ready is not None:
+                self.ready.set()
+
+    def close(self):
+        self.running = False
+        self.thread.join(timeout=1)
+        self.queue_depth.set_function(None)
+
+class CanTrafficGenerator:
+    PATTERNS = ('constant', 'counter', 'random', 'signals')
+    ERROR_FLAG = 0x20000000
+    # SocketCAN error classes: controller, protocol violation, no ACK, bus off
+    ERROR_CLASSES = (0x04, 0x08, 0x20, 0x40)
+
+    def __init__(self, seed=0, database=None, error_rate=0.0):
+        self.seed = seed
+        self.database = database or CanSignalDatabase.default()
+        self.error_rate = error_rate
+        self.streams = []
+        self.bursts = []
+        self.live = None
+        self.reset()
+
+    @classmethod
+    def default(cls, seed=0, streams=64, error_rate=2.0):
+        """A vehicle-like mix: the known ECUs, periodic traffic, a diagnostic burst and bus errors"""
+        generator = cls(seed, error_rate=error_rate)
+        generator.add_stream(0x100, 0.010, 'signals')
+        generator.add_stream(0x200, 0.020, 'signals')
+        generator.add_stream(0x300, 0.010, 'signals')
+        rng = random.Random(f"{seed}:mix")
+        periods = (0.001, 0.002, 0.005, 0.010, 0.010, 0.020, 0.050, 0.100, 0.500, 1.0)
+        for arbitration_id in sorted(rng.sample(range(0x080, 0x700), streams)):
+            generator.add_stream(arbitration_id, rng.choice(periods),
+                                 rng.choice(('counter', 'counter', 'random', 'constant')),
+                                 length=rng.choice((8, 8, 8, 4, 2)), jitter=rng.choice((0.0, 0.0, 0.1)))
+        generator.add_burst(0x7E8, interval=0.5, count=16, spacing=0.0002)
+        return generator
+
+    def add_stream(self, arbitration_id, period, pattern='random', length=8, jitter=0.0):
+        """Periodic frames; jitter delays each frame by up to that fraction of the period"""
+        if pattern not in self.PATTERNS:
+            raise ValueError(f"Unknown payload pattern: {pattern}")
+        if period <= 0:
+            raise ValueError("Period must be positive")
+        if pattern == 'signals' and arbitration_id not in self.database.messages:
+            raise ValueError(f"No signal layout for 0x{arbitration_id:03X}")
+        self.streams.append({'id': arbitration_id, 'period': period, 'pattern': pattern,
+                             'length': length, 'jitter': jitter})
+        self.reset()
+
+    def add_burst(self, arbitration_id, interval, count, spacing=0.0002, pattern='random', length=8):
+        """count back-to-back frames every interval seconds, such as a diagnostic session"""
+        if pattern not in self.PATTERNS or pattern == 'signals':
+            raise ValueError(f"Unsupported burst pattern: {pattern}")
+        self.bursts.append({'id': arbitration_id, 'period': interval, 'pattern': pattern, 'length': length,
+                            'count': count, 'spacing': spacing, 'jitter': 0.0})
+        self.reset()
+
+    def reset(self):
+        """Rewind to time zero; the next run repeats the previous one exactly"""
+        self.clock = 0.0
+        self.carry = []
+        self.state = []
+        for index, stream in enumerate(self.streams + self.bursts):
+            rng = random.Random(f"{self.seed}:{index}:{stream['id']}")
+            self.state.append({
+                'stream': stream, 'rng': rng, 'next': 0,
+                'phase': rng.random() * stream['period'],
+                'pool': self._payload_pool(stream, rng)
+            })
+        self.error_rng = random.Random(f"{self.seed}:errors")
+        self.next_error = self.error_rng.expovariate(self.error_rate) if self.error_rate > 0 else float('inf')
+
+    def _payload_pool(self, stream, rng):
+        """Precompute payloads so generating a frame is just an index"""
+        length = stream['length']
+        if stream['pattern'] == 'constant':
+            return [rng.randbytes(length)]
+        if stream['pattern'] == 'random':
+            return [rng.randbytes(length) for _ in range(1024)]
+        if stream['pattern'] == 'counter':
+            # Rolling alive counter in the first byte, the rest fixed
+            tail = rng.randbytes(length - 1)
+            return [bytes([value]) + tail for value in range(256)]
+        signals = self.database.messages[stream['id']]['signals']
+        raw = {signal.name: rng.getrandbits(signal.length) for signal in signals}
+        pool = []
+        for _ in range(1024):
+            # Random walk so consecutive frames look like slowly changing sensor values
+            for signal in signals:
+                mask = (1 << signal.length) - 1
+                step = max(1, mask >> 6)
+                raw[signal.name] = min(mask, max(0, raw[signal.name] + rng.randint(-step, step)))
+            pool.append(self.database.encode(stream['id'], {
+                signal.name: raw[signal.name] * signal.scale + signal.offset for signal in signals
+            }))
+        return pool
+
+    def generate(self, until):
+        """Frames with nominal times in [clock, until), as (timestamp, id, data) sorted by timestamp.
+
+        Output depends only on the seed, the configuration and the sequence of
+        until values, so a run with the same batch length is reproducible.
+        """
+        frames = self.carry
+        extend = frames.extend
+        for state in self.state:
+            stream = state['stream']
+            period = stream['period']
+            first = state['next']
+            last = max(first, math.ceil((until - state['phase']) / period))
+            if last == first:
+                continue
+            state['next'] = last
+            phase, arbitration_id, pool = state['phase'], stream['id'], state['pool']
+            pattern = stream['pattern']
+            rng = state['rng']
+            if 'count' in stream:
+                count, spacing, size = stream['count'], stream['spacing'], len(pool)
+                extend([(phase + k * period + j * spacing, arbitration_id, pool[(k * count + j) % size])
+                        for k in range(first, last) for j in range(count)])
+                continue
+            if pattern == 'constant':
+                payloads = itertools.repeat(pool[0], last - first)
+            elif pattern == 'counter':
+                payloads = [pool[k & 255] for k in range(first, last)]
+            elif pattern == 'random':
+                getrandbits = rng.getrandbits
+                payloads = [pool[getrandbits(10)] for _ in range(first, last)]
+            else:
+                size = len(pool)
+                payloads = [pool[k % size] for k in range(first, last)]
+            if stream['jitter']:
+                spread = stream['jitter'] * period
+                random_value = rng.random
+                extend([(phase + k * period + random_value() * spread, arbitration_id, payload)
+                        for k, payload in zip(range(first, last), payloads)])
+            else:
+                extend([(phase + k * period, arbitration_id, payload)
+                        for k, payload in zip(range(first, last), payloads)])
+        while self.next_error < until:
+            error_class = self.error_rng.choice(self.ERROR_CLASSES)
+            frames.append((self.next_error, self.ERROR_FLAG | error_class,
+                           bytes([0, 0, self.error_rng.getrandbits(8), 0, 0, 0, 0, 0])))
+            self.next_error += self.error_rng.expovariate(self.error_rate)
+        frames.sort(key=lambda frame: frame[0])
+        # Jittered and burst frames can land past until; hold them so batches stay in order
+        split = bisect.bisect_left(frames, until, key=lambda frame: frame[0])
+        self.carry = frames[split:]
+        self.clock = until
+        return frames[:split]
+
+    def batches(self, duration, batch_seconds=0.01):
+        """Yield consecutive generate() batches covering duration seconds of bus time"""
+        end = self.clock + duration
+        while self.clock < end - 1e-12:
+            yield self.generate(min(self.clock + batch_seconds, end))
+
+    @staticmethod
+    def fingerprint(frames, crc=0):
+        """CRC32 over timestamps, IDs and payloads; equal runs give equal fingerprints"""
+        for timestamp, arbitration_id, data in frames:
+            crc = zlib.crc32(struct.pack('<dI', timestamp, arbitration_id) + data, crc)
+        return crc
+
+    def benchmark(self, network_manager, frames=1000000, batch_seconds=0.1, decode=True):
+        """Push a fixed workload through ingest, filtering and batch decoding; returns timings"""
+        self.reset()
+        timings = {'generate': 0.0, 'ingest': 0.0, 'decode': 0.0}
+        total = accepted = errors = 0
+        crc = 0
+        while total < frames:
+            started = time.perf_counter()
+            batch = self.generate(self.clock + batch_seconds)
+            generated = time.perf_counter()
+            kept = network_manager.ingest_can_frames(batch)
+            ingested = time.perf_counter()
+            if decode and kept:
+                network_manager.can_database.decode_batch(
+                    [frame[1] for frame in kept], b"".join([frame[2].ljust(8, b'\0') for frame in kept]))
+            timings['generate'] += generated - started
+            timings['ingest'] += ingested - generated
+            timings['decode'] += time.perf_counter() - ingested
+            total += len(batch)
+            accepted += len(kept)
+            errors += sum(1 for frame in batch if frame[1] & self.ERROR_FLAG)
+            crc = self.fingerprint(batch, crc)
+        elapsed = sum(timings.values())
+        return {
+            'frames': total, 'accepted': accepted, 'errors': errors, 'bus_seconds': self.clock,
+            'seconds': elapsed, 'frames_per_second': total / elapsed if elapsed else 0.0,
+            'stage_seconds': timings, 'fingerprint': f"{crc:08x}"
+        }
+
+    def start_live(self, endpoint, speed=1.0, tick=0.01):
+        """Send frames onto a bus endpoint in real time (scaled by speed) from a background thread"""
+        self.stop_live()
+        self.reset()
+        running = threading.Event()
+        running.set()
+
+        def pump():
+            started = time.monotonic()
+            while running.is_set():
+                for frame in self.generate((time.monotonic() - started) * speed):
+                    endpoint.send(frame[1], frame[2])
+                time.sleep(tick)
+
+        self.live = (running, threading.Thread(target=pump, name="can-traffic", daemon=True))
+        self.live[1].start()
+
+    def stop_live(self):
+        if self.live:
+            running, thread = self.live
+            running.clear()
+            thread.join(timeout=1)
+            self.live = None
+
+class NetworkManager:
+    def __init__(self, registry=None):
+        self.registry = metrics if registry is None else registry
         self.available_networks = []
         self.connected_network = None
         self.network_status = "Disconnected"
         self.can_devices = []
+        self.can_database = CanSignalDatabase.default()
+        self.can_filter = CanFilter()
+        self.can_stats = CanBusStats()
+        self.can_channels = {}
+        self.can_listeners = []
+        self.can_carry = []
+        self.can_recent = deque(maxlen=1000)
+        self.can_ready = threading.Event()
+        self.can_consumer = None
+        self.can_consuming = False
+        self.listeners = []
+        self.scan_counter = self.registry.counter("network_scans_total", "WiFi and CAN device scans", labels=('kind',))
+        self.connect_counter = self.registry.counter("network_connects_total", "WiFi connection attempts", labels=('result',))
+        self.can_sent = self.registry.counter("can_frames_sent_total", "CAN frames sent")
+        self.can_send_failed = self.registry.counter("can_send_failures_total", "CAN sends refused by an offline or unknown device")
+        self.can_received = self.registry.counter("can_frames_received_total", "CAN frames ingested")
+        self.can_rejected = self.registry.counter("can_frames_filtered_total", "CAN frames dropped by the console filter")
+        self.add_can_listener(self.log_can_frames)
         
     def scan_wifi_networks(self):
         """Scan for available WiFi networks (simulated)"""
@@ -33,13 +1411,24 @@ class NetworkManager:
             self.network_status = "Connected"
         
         self.available_networks = simulated_networks
+        self.scan_counter.labels('wifi').inc()
+        self._notify('wifi', self.available_networks)
         return self.available_networks
     
+    def add_listener(self, callback):
+        """Register callback(kind, items) for WiFi and CAN device scan results"""
+        self.listeners.append(callback)
+    
+    def _notify(self, kind, items):
+        for callback in self.listeners:
+            callback(kind, items)
+    
     def connect_to_wifi(self, ssid, password=None):
         """Connect to a WiFi network (simulated)"""
         for network in self.available_networks:
             if network["ssid"] == ssid:
                 if network["security"] != "Open" and not password:
+                    self.connect_counter.labels('password_required').inc()
                     return False, "Password required"
                 
                 self.network_status = "Connecting..."
@@ -48,8 +1437,10 @@ class NetworkManager:
                 self.connected_network = network
                 network["connected"] = True
                 self.network_status = "Connected"
+                self.connect_counter.labels('success').inc()
                 return True, f"Connected to {ssid}"
         
+        self.connect_counter.labels('not_found').inc()
         return False, "Network not found"
     
     def disconnect_wifi(self):
@@ -81,6 +1472,8 @@ class NetworkManager:
             {"id": "CAN_003", "type": "Brake System", "status": "Offline", "data_rate": "125 kbps"},
         ]
         self.can_devices = simulated_devices
+        self.scan_counter.labels('can').inc()
+        self._notify('can', self.can_devices)
         return self.can_devices
     
     def send_can_message(self, device_id, message):
@@ -92,27 +1485,240 @@ class NetworkManager:
                 break
         
         if not device:
+            self.can_send_failed.inc()
             return False, "Device not found"
         
         if device["status"] != "Online":
+            self.can_send_failed.inc()
             return False, "Device offline"
         
-        timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-        print(f"[CAN] {timestamp} -> {device_id}: {message}")
+        self.can_sent.inc()
+        event_log.log("can_tx", device=device_id, message=message)
         return True, f"Message sent to {device_id}"
     
+    def ingest_can_frames(self, frames):
+        """Count every (timestamp, id, data) frame and keep those the filter accepts"""
+        accepted = []
+        accepts = self.can_filter.accepts
+        record = self.can_stats.record
+        with self.can_stats.lock:
+            for frame in frames:
+                record(frame[1], len(frame[2]), frame[0])
+                if accepts(frame[1]):
+                    accepted.append(frame)
+                else:
+                    self.can_stats.rejected += 1
+        self.can_received.inc(len(frames))
+        self.can_rejected.inc(len(frames) - len(accepted))
+        return accepted
+
+    def add_can_channel(self, name, endpoint, capacity=10000, policy='drop-oldest'):
+        """Start a reader thread for a named bus endpoint"""
+        if name in self.can_channels:
+            return False, f"Channel {name} already exists"
+        self.can_channels[name] = CanChannel(name, endpoint, capacity, policy, ready=self.can_ready, registry=self.registry)
+        if self.can_consumer is None or not self.can_consumer.is_alive():
+            self.can_consuming = True
+            self.can_consumer = threading.Thread(target=self._consume_can_channels, name="can-consumer", daemon=True)
+            self.can_consumer.start()
+        return True, f"Channel {name} added"
+    
+    def close_can_channels(self):
+        """Stop every channel's reader thread"""
+        for name in list(self.can_channels):
+            self.remove_can_channel(name)
+    
+    def remove_can_channel(self, name):
+        channel = self.can_channels.pop(name, None)
+        if channel:
+            channel.close()
+            if not self.can_channels and self.can_consumer:
+                self.can_consuming = False
+                self.can_ready.set()
+                self.can_consumer.join(timeout=1)
+                self.can_consumer = None
+            return True, f"Channel {name} removed"
+        return False, "Channel not found"
+    
+    def add_can_listener(self, callback):
+        """Register a callback for each merged batch of accepted frames; it runs on the consumer thread"""
+        self.can_listeners.append(callback)
+    
+    def log_can_frames(self, frames):
+        """Listener that records accepted channel frames in the event log"""
+        for frame in frames:
+            event_log.log("can_rx", channel=frame[3], id=frame[1], data=bytes(frame[2]).hex())
+    
+    def _consume_can_channels(self, limit=5000):
+        """Consumer thread: drain every channel as frames arrive, feeding stats, listeners and the recent buffer"""
+        while self.can_consuming:
+            self.can_ready.wait(0.1)
+            self.can_ready.clear()
+            while self.can_consuming:
+                frames = self.read_can_channels(limit)
+                self.can_recent.extend(frames)
+                if not frames and not self.can_carry:
+                    break
+    
+    def read_can_channels(self, limit=1000):
+        """Merge queued frames from every channel in timestamp order, then filter.
+
+        A channel cut off at limit may still hold older frames than other
+        channels returned, so anything newer than its last drained frame is
+        carried to the next call to keep the output ordered across calls. The
+        same goes for frames newer than one a reader is still enqueuing.
+        """
+        channels = list(self.can_channels.values())
+        cutoff = time.monotonic()
+        for marker in [channel.inflight for channel in channels]:
+            if marker is not None:
+                cutoff = min(cutoff, marker)
+        batches = [channel.queue.drain(limit) for channel in channels]
+        merged = list(heapq.merge(self.can_carry, *batches, key=lambda frame: frame[0]))
+        truncated = [batch[-1][0] for batch in batches if len(batch) >= limit]
+        cutoff = min([cutoff] + truncated)
+        split = bisect.bisect_right(merged, cutoff, key=lambda frame: frame[0])
+        merged, self.can_carry = merged[:split], merged[split:]
+        frames = self.ingest_can_frames(merged)
+        for callback in self.can_listeners:
+            callback(frames)
+        return frames
+    
+    def get_can_channel_stats(self):
+        return {
+            name: {
+                'received': channel.received,
+                'queued': len(channel.queue.frames),
+                'dropped': channel.queue.dropped,
+                'policy': channel.queue.policy
+            }
+            for name, channel in self.can_channels.items()
+        }
+    
     def receive_can_messages(self):
-        """Receive CAN bus messages (simulated)"""
-        messages = [
-            {"timestamp": datetime.now().strftime("%H:%M:%S.%f")[:-3], "device": "CAN_001", "message": "RPM: 2500"},
-            {"timestamp": datetime.now().strftime("%H:%M:%S.%f")[:-3], "device": "CAN_002", "message": "Gear: 3"},
-        ]
+        """Receive CAN bus messages (simulated unless channels are attached)"""
+        if self.can_channels:
+            # The consumer thread has already counted and logged these; the UI only renders them
+            frames = []
+            while self.can_recent:
+                frames.append(self.can_recent.popleft())
+        else:
+            now = time.monotonic()
+            frames = self.ingest_can_frames([
+                (now, 0x100, self.can_database.encode(0x100, {"RPM": 2500, "CoolantTemp": 90, "Throttle": 20})),
+                (now, 0x200, self.can_database.encode(0x200, {"Gear": 3, "OilTemp": 85})),
+            ])
+        messages = []
+        for frame in frames:
+            arbitration_id, data = frame[1], frame[2]
+            layout = self.can_database.messages.get(arbitration_id)
+            values = self.can_database.decode(arbitration_id, data)
+            messages.append({
+                "timestamp": datetime.now().strftime("%H:%M:%S.%f")[:-3],
+                "channel": frame[3] if len(frame) > 3 else None,
+                "device": layout['device'] if layout else f"0x{arbitration_id:03X}",
+                "id": arbitration_id,
+                "data": bytes(data).hex(),
+                "signals": values,
+                "message": ", ".join(f"{name}: {value:g}" for name, value in values.items()) if values else bytes(data).hex()
+            })
         return messages
 
+class DirectoryWatcher:
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    ALL_CHANGES = IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    def __init__(self, directory, on_events, mask=ALL_CHANGES, poll_interval=1.0):
+        self.directory = os.path.abspath(directory)
+        self.on_events = on_events
+        self.mask = mask
+        self.poll_interval = poll_interval
+        self.running = False
+
+    def start(self):
+        """Watch with inotify where available, otherwise poll the directory's mtime.
+
+        on_events receives a list of (mask, name) pairs, or None when polling
+        only knows that something in the directory changed.
+        """
+        self.running = True
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def stop(self):
+        self.running = False
+
+    def _open_inotify(self):
+        if not sys.platform.startswith('linux'):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+            fd = libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+            if fd < 0:
+                return None
+            if libc.inotify_add_watch(fd, self.directory.encode(), self.mask) < 0:
+                os.close(fd)
+                return None
+            return fd
+        except (OSError, AttributeError):
+            return None
+
+    def _run(self):
+        fd = self._open_inotify()
+        if fd is None:
+            self._poll()
+            return
+        try:
+            while self.running:
+                readable, _, _ = select.select([fd], [], [], self.poll_interval)
+                if not readable or not self.running:
+                    continue
+                try:
+                    data = os.read(fd, 65536)
+                except BlockingIOError:
+                    continue
+                events = []
+                offset = 0
+                while offset + 16 <= len(data):
+                    _, mask, _, length = struct.unpack_from('iIII', data, offset)
+                    name = data[offset + 16:offset + 16 + length].rstrip(b'\0')
+                    events.append((mask, os.fsdecode(name)))
+                    offset += 16 + length
+                if events:
+                    self.on_events(events)
+        finally:
+            os.close(fd)
+
+    def _poll(self):
+        last = None
+        while self.running:
+            try:
+                mtime = os.stat(self.directory).st_mtime_ns
+            except OSError:
+                mtime = None
+            if last is not None and mtime != last:
+                self.on_events(None)
+            last = mtime
+            time.sleep(self.poll_interval)
+
 class AccountManager:
     def __init__(self):
         self.accounts_file = "ruscat_accounts.json"
+        self.lock_file = self.accounts_file + ".lock"
         self.current_user = None
+        self.synced_lines = {}
+        self.synced_owners = {}
+        self.dirty = set()
+        self.store_lock = threading.RLock()
+        self.store_depth = 0
+        self.listeners = []
+        self.login_counter = metrics.counter("logins_total", "Login attempts by outcome", labels=('result',))
+        self.login_seconds = metrics.histogram("login_seconds", "Time to check credentials and record the login")
         self.accounts = self.load_accounts()
         self.create_default_dev_account()
     
@@ -144,24 +1750,186 @@ class AccountManager:
                     'memory_game': {'plays': 0, 'best_level': 0}
                 }
             }
-            self.save_accounts()
+            self.save_accounts("RusCatDev")
+            event_log.log("account_created", user="RusCatDev", profile_type="Developer")
             print("🔧 Default developer account 'RusCatDev' created!")
     
     def load_accounts(self):
         """Load accounts from JSON file"""
         try:
-            if os.path.exists(self.accounts_file):
-                with open(self.accounts_file, 'r') as f:
-                    return json.load(f)
-            return {}
+            accounts = {}
+            for username, (line, account) in self._read_store().items():
+                accounts[username] = account
+                self._mark_synced(username, line)
+            return accounts
         except:
             return {}
     
-    def save_accounts(self):
-        """Save accounts to JSON file"""
+    def _record_line(self, username, account):
+        return json.dumps({username: account})[1:-1]
+    
+    def _mark_synced(self, username, line):
+        old_line = self.synced_lines.get(username)
+        if old_line is not None:
+            self.synced_owners.pop(old_line, None)
+        self.synced_lines[username] = line
+        self.synced_owners[line] = username
+    
+    def _read_store(self):
+        """Map username -> (line, account) from disk.
+
+        The store is a JSON object with one account per line, so a line that
+        matches what we last synced is recognised without being parsed; its
+        account is returned as None. Older pretty-printed files are parsed whole.
+        """
+        if not os.path.exists(self.accounts_file):
+            return {}
+        with open(self.accounts_file, 'r') as f:
+            text = f.read()
+        lines = text.strip().splitlines()
+        records = {}
         try:
-            with open(self.accounts_file, 'w') as f:
-                json.dump(self.accounts, f, indent=2)
+            if not lines or lines[0] != '{' or lines[-1] != '}':
+                raise ValueError("not a line-per-account store")
+            for raw_line in lines[1:-1]:
+                line = raw_line.rstrip(',')
+                owner = self.synced_owners.get(line)
+                if owner is not None:
+                    records[owner] = (line, None)
+                    continue
+                username, account = next(iter(json.loads("{" + line + "}").items()))
+                records[username] = (line, account)
+        except ValueError:
+            records = {
+                username: (self._record_line(username, account), account)
+                for username, account in json.loads(text).items()
+            }
+        return records
+    
+    @contextlib.contextmanager
+    def _locked_store(self):
+        """Advisory lock shared by every RusCat instance using this store; reentrant per thread"""
+        with self.store_lock:
+            if self.store_depth:
+                # flock is per open file, so a nested open would deadlock against ourselves
+                self.store_depth += 1
+                try:
+                    yield
+                finally:
+                    self.store_depth -= 1
+                return
+            with open(self.lock_file, 'a+') as lock:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                else:
+                    lock.seek(0)
+                    msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+                self.store_depth = 1
+                try:
+                    yield
+                finally:
+                    self.store_depth = 0
+                    if fcntl:
+                        fcntl.flock(lock, fcntl.LOCK_UN)
+                    else:
+                        lock.seek(0)
+                        msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+    
+    def reload_changed(self):
+        """Pick up accounts other instances changed; local unsaved edits win"""
+        with self.store_lock:
+            if not os.path.exists(self.accounts_file):
+                return []
+            try:
+                records = self._read_store()
+            except (OSError, ValueError):
+                return []
+            changed = []
+            for username, (line, account) in records.items():
+                if self.synced_lines.get(username) == line or username in self.dirty:
+                    continue
+                if account is None:
+                    account = json.loads("{" + line + "}")[username]
+                self.accounts[username] = account
+                self._mark_synced(username, line)
+                changed.append(username)
+            for username in list(self.synced_lines):
+                if username not in records and username not in self.dirty:
+                    self.synced_owners.pop(self.synced_lines.pop(username), None)
+                    self.accounts.pop(username, None)
+                    changed.append(username)
+            if changed:
+                self._notify(changed)
+            return changed
+    
+    def add_listener(self, callback):
+        """Register callback(usernames) for accounts added, changed or removed"""
+        self.listeners.append(callback)
+    
+    def remove_listener(self, callback):
+        """Unregister a callback added with add_listener"""
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+    
+    def _notify(self, usernames):
+        for callback in list(self.listeners):
+            callback(usernames)
+    
+    def watch_for_changes(self, root, on_change=None, interval=200):
+        """Reload changed accounts whenever another instance writes the store.
+
+        The watcher thread only flags the change; the reload runs on the Tk
+        thread so it never mutates accounts while the UI is reading them.
+        """
+        reload_requested = threading.Event()
+        store_name = os.path.basename(self.accounts_file)
+        
+        def on_events(events):
+            # Writers replace the file, so the directory is watched rather than the file
+            if events is None or any(name == store_name for _, name in events):
+                reload_requested.set()
+        
+        def reload():
+            if reload_requested.is_set():
+                reload_requested.clear()
+                changed = self.reload_changed()
+                if changed and on_change:
+                    on_change(changed)
+            root.after(interval, reload)
+        
+        root.after(interval, reload)
+        self.watcher = DirectoryWatcher(
+            os.path.dirname(os.path.abspath(self.accounts_file)), on_events,
+            mask=DirectoryWatcher.IN_CLOSE_WRITE | DirectoryWatcher.IN_MOVED_TO
+        )
+        self.watcher.start()
+        return self.watcher
+    
+    def save_accounts(self, *usernames):
+        """Save accounts to JSON file, merging changes made by other instances.
+
+        Pass the usernames that changed; with none, every account that differs
+        from the last synced copy is written.
+        """
+        try:
+            with self.store_lock, self._locked_store():
+                if usernames:
+                    self.dirty.update(usernames)
+                else:
+                    self.dirty.update(
+                        username for username, account in self.accounts.items()
+                        if self._record_line(username, account) != self.synced_lines.get(username)
+                    )
+                self.reload_changed()
+                for username in self.dirty:
+                    if username in self.accounts:
+                        self._mark_synced(username, self._record_line(username, self.accounts[username]))
+                
+                temp_file = f"{self.accounts_file}.{os.getpid()}.tmp"
+                with open(temp_file, 'w') as f:
+                    f.write("{\n" + ",\n".join(self.synced_lines.values()) + "\n}\n")
+                os.replace(temp_file, self.accounts_file)
+                self.dirty.clear()
             return True
         except:
             return False
@@ -172,9 +1940,6 @@ class AccountManager:
     
     def create_account(self, username, password, profile_type="User"):
         """Create a new account"""
-        if username in self.accounts:
-            return False, "Username already exists!"
-        
         if len(username) < 3:
             return False, "Username must be at least 3 characters!"
         
@@ -191,7 +1956,7 @@ class AccountManager:
             'can_bus_access': profile_type == "Developer"
         }
         
-        self.accounts[username] = {
+        account = {
             'password': self.hash_password(password),
             'profile_type': profile_type,
             'created_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
@@ -209,27 +1974,56 @@ class AccountManager:
             }
         }
         
-        if self.save_accounts():
+        try:
+            with self._locked_store():
+                # Another instance may have taken the name since we last synced
+                self.reload_changed()
+                if username in self.accounts:
+                    return False, "Username already exists!"
+                self.accounts[username] = account
+                saved = self.save_accounts(username)
+                if not saved:
+                    self.accounts.pop(username, None)
+                    self.dirty.discard(username)
+        except OSError:
+            saved = False
+        
+        if saved:
+            event_log.log("account_created", user=username, profile_type=profile_type)
+            self._notify([username])
             return True, f"Account '{username}' created successfully!"
         else:
             return False, "Failed to save account!"
     
     def login(self, username, password):
         """Login to an account"""
+        with self.login_seconds.time():
+            success, message = self._login(username, password)
+        self.login_counter.labels('success' if success else 'failure').inc()
+        return success, message
+    
+    def _login(self, username, password):
         if username not in self.accounts:
+            self.reload_changed()
+        if username not in self.accounts:
+            event_log.log("login_failed", user=username, reason="unknown account")
             return False, "Account not found!"
         
         account = self.accounts[username]
         if account['password'] == self.hash_password(password):
             account['last_login'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             self.current_user = username
-            self.save_accounts()
+            self.save_accounts(username)
+            event_log.log("login", user=username)
             return True, f"Welcome back, {username}!"
         else:
+            event_log.log("login_failed", user=username, reason="invalid password")
             return False, "Invalid password!"
     
     def logout(self):
         """Logout current user"""
+        if self.current_user:
+            event_log.log("logout", user=self.current_user)
         self.current_user = None
         return True
     
@@ -249,116 +2043,1541 @@ class AccountManager:
         user_info = self.get_current_user_info()
         return user_info and user_info['permissions'].get(permission, False)
 
-class PowerManager:
-    @staticmethod
-    def shutdown():
-        """Shutdown the computer"""
-        try:
-            if messagebox.askyesno("Shutdown", "Are you sure you want to shutdown?"):
-                print("🔄 Shutting down system...")
-                if os.name == 'nt':
-                    os.system("shutdown /s /t 0")
-                elif sys.platform.startswith('linux'):
-                    os.system("shutdown -h now")
-                elif sys.platform == "darwin":
-                    os.system("shutdown -h now")
+class ShutdownCoordinator:
+    def __init__(self, system_command=os.system):
+        self.system_command = system_command
+        self.hooks = []
+        self.last_report = []
+
+    def register(self, name, callback, priority=50, deadline=2.0, parallel=True):
+        """Add a teardown hook.
+
+        Lower priorities run first. Hooks sharing a priority run in parallel
+        threads; parallel=False runs the hook on the calling thread, which Tk
+        work needs. A threaded hook still running at its deadline is abandoned.
+        """
+        self.hooks.append({'name': name, 'callback': callback, 'priority': priority,
+                           'deadline': deadline, 'parallel': parallel})
+
+    def unregister(self, name):
+        self.hooks = [hook for hook in self.hooks if hook['name'] != name]
+
+    def _call(self, hook, result):
+        started = time.perf_counter()
+        outcome = {'status': 'ok'}
+        try:
+            hook['callback']()
+        except Exception as e:
+            outcome = {'status': 'error', 'error': str(e)}
+        # An abandoned hook that finishes late must not rewrite the report
+        if result['status'] == 'running':
+            outcome['duration'] = time.perf_counter() - started
+            result.update(outcome)
+
+    def run(self):
+        """Run every hook once and return per-hook timings"""
+        report = []
+        for priority in sorted({hook['priority'] for hook in self.hooks}):
+            group = [hook for hook in self.hooks if hook['priority'] == priority]
+            started = time.perf_counter()
+            pending = []
+            for hook in group:
+                result = {'name': hook['name'], 'priority': priority, 'status': 'running', 'duration': None}
+                report.append(result)
+                if hook['parallel']:
+                    thread = threading.Thread(target=self._call, args=(hook, result), daemon=True)
+                    thread.start()
+                    pending.append((hook, result, thread))
+                else:
+                    self._call(hook, result)
+            for hook, result, thread in pending:
+                thread.join(max(0, started + hook['deadline'] - time.perf_counter()))
+                if thread.is_alive():
+                    result['status'] = 'abandoned'
+                    result['duration'] = time.perf_counter() - started
+            for result in report[-len(group):]:
+                event_log.log("shutdown_hook", hook=result['name'], status=result['status'],
+                              ms=round((result['duration'] or 0) * 1000, 2))
+        self.last_report = report
+        print("🔻 Teardown: " + ", ".join(
+            f"{result['name']} {(result['duration'] or 0) * 1000:.1f} ms {result['status']}" for result in report
+        ))
+        return report
+
+    def power_off(self, command):
+        """Run the hooks, then hand the platform command to the system"""
+        self.run()
+        return self.system_command(command)
+
+class PowerManager:
+    def __init__(self, shutdown_coordinator=None):
+        self.shutdown_coordinator = shutdown_coordinator or ShutdownCoordinator()
+
+    @staticmethod
+    def power_command(action):
+        """Platform command for 'shutdown' or 'restart', or None if unsupported"""
+        commands = {
+            'shutdown': {'nt': "shutdown /s /t 0", 'linux': "shutdown -h now", 'darwin': "shutdown -h now"},
+            'restart': {'nt': "shutdown /r /t 0", 'linux': "reboot", 'darwin': "shutdown -r now"},
+        }[action]
+        if os.name == 'nt':
+            return commands['nt']
+        elif sys.platform.startswith('linux'):
+            return commands['linux']
+        elif sys.platform == "darwin":
+            return commands['darwin']
+        return None
+
+    def shutdown(self):
+        """Shutdown the computer"""
+        try:
+            if messagebox.askyesno("Shutdown", "Are you sure you want to shutdown?"):
+                command = self.power_command('shutdown')
+                if command:
+                    print("🔄 Shutting down system...")
+                    self.shutdown_coordinator.power_off(command)
+                else:
+                    messagebox.showwarning("Not Supported", "Shutdown not supported")
+        except Exception as e:
+            messagebox.showerror("Error", f"Shutdown failed: {e}")
+
+    def restart(self):
+        """Restart the computer"""
+        try:
+            if messagebox.askyesno("Restart", "Are you sure you want to restart?"):
+                command = self.power_command('restart')
+                if command:
+                    print("🔄 Restarting system...")
+                    self.shutdown_coordinator.power_off(command)
+                else:
+                    messagebox.showwarning("Not Supported", "Restart not supported")
+        except Exception as e:
+            messagebox.showerror("Error", f"Restart failed: {e}")
+
+# Runs inside each prewarmed interpreter: imports the common modules up
+# front, then waits on stdin for "run <script>" and later "focus" commands.
+_LAUNCHER_BOOTSTRAP = r'''
+import sys, os, runpy, threading, queue
+import json, random, time, hashlib, subprocess, datetime
+import tkinter
+from tkinter import messagebox, simpledialog, ttk
+
+PROTO = "\x00ruscat:"
+commands = queue.Queue()
+
+def emit(line):
+    sys.__stdout__.write(PROTO + line + "\n")
+    sys.__stdout__.flush()
+
+header = sys.stdin.readline().strip()
+if not header.startswith("run "):
+    sys.exit(0)
+script = header[4:]
+
+def read_commands():
+    for line in sys.stdin:
+        commands.put(line.strip())
+
+threading.Thread(target=read_commands, daemon=True).start()
+
+mapped = []
+original_init = tkinter.Tk.__init__
+
+def poll_commands(root):
+    while not commands.empty():
+        if commands.get() == "focus":
+            root.deiconify()
+            root.lift()
+            root.focus_force()
+    root.after(100, poll_commands, root)
+
+def on_map(event):
+    if not mapped:
+        mapped.append(True)
+        emit("mapped")
+
+def patched_init(self, *args, **kwargs):
+    original_init(self, *args, **kwargs)
+    self.bind("<Map>", on_map, add="+")
+    self.after(100, poll_commands, self)
+
+tkinter.Tk.__init__ = patched_init
+sys.argv = [script]
+sys.path.insert(0, os.path.dirname(script))
+runpy.run_path(script, run_name="__main__")
+'''
+
+class ToolLauncher:
+    PROTOCOL_PREFIX = "\x00ruscat:"
+
+    def __init__(self, pool_size=1):
+        self.pool_size = pool_size
+        self.idle = []
+        self.running = {}
+        self.latencies = {}
+        self.lock = threading.Lock()
+
+    def _spawn(self):
+        """Start an interpreter that preloads the common modules and waits"""
+        return subprocess.Popen(
+            [sys.executable, "-u", "-c", _LAUNCHER_BOOTSTRAP],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1
+        )
+
+    def prewarm(self):
+        """Fill the idle pool in the background"""
+        def fill():
+            with self.lock:
+                self.idle = [proc for proc in self.idle if proc.poll() is None]
+                missing = self.pool_size - len(self.idle)
+            for _ in range(missing):
+                proc = self._spawn()
+                with self.lock:
+                    self.idle.append(proc)
+        threading.Thread(target=fill, daemon=True).start()
+
+    def _take_idle(self):
+        with self.lock:
+            while self.idle:
+                proc = self.idle.pop(0)
+                if proc.poll() is None:
+                    return proc
+        return None
+
+    def _watch(self, script, proc, clicked, mode):
+        """Relay tool output and record click-to-window latency"""
+        for line in proc.stdout:
+            if line.startswith(self.PROTOCOL_PREFIX + "mapped"):
+                elapsed = (time.perf_counter() - clicked) * 1000
+                with self.lock:
+                    self.latencies.setdefault(script, {'cold': [], 'warm': []})[mode].append(elapsed)
+                print(f"⏱️ {os.path.basename(script)} window in {elapsed:.1f} ms ({mode})")
+            else:
+                sys.stdout.write(line)
+        with self.lock:
+            if self.running.get(script) is proc:
+                del self.running[script]
+
+    def launch(self, script):
+        """Dispatch a tool script, or focus it if it is already running"""
+        script = os.path.abspath(script)
+        name = os.path.basename(script)
+
+        with self.lock:
+            proc = self.running.get(script)
+        if proc and proc.poll() is None:
+            try:
+                proc.stdin.write("focus\n")
+                proc.stdin.flush()
+                return True, f"{name} is already running"
+            except OSError:
+                pass
+
+        clicked = time.perf_counter()
+        proc = self._take_idle()
+        mode = 'warm'
+        if proc is None:
+            proc = self._spawn()
+            mode = 'cold'
+
+        try:
+            proc.stdin.write(f"run {script}\n")
+            proc.stdin.flush()
+        except OSError as e:
+            return False, f"Launch failed: {e}"
+
+        with self.lock:
+            self.running[script] = proc
+        threading.Thread(target=self._watch, args=(script, proc, clicked, mode), daemon=True).start()
+        self.prewarm()
+        return True, f"Launched {name}"
+
+    def get_latency_report(self):
+        """Average click-to-window latency per tool, split by cold/warm start"""
+        report = {}
+        with self.lock:
+            for script, samples in self.latencies.items():
+                report[os.path.basename(script)] = {
+                    mode: (sum(values) / len(values) if values else None)
+                    for mode, values in samples.items()
+                }
+        return report
+
+    def shutdown(self):
+        """Stop idle interpreters"""
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for proc in idle:
+            if proc.poll() is None:
+                proc.terminate()
+
+class TournamentManager:
+    def __init__(self, account_manager):
+        self.account_manager = account_manager
+        self.players = []
+        self.scores = {}
+        self.tournament_active = False
+        
+    def add_player(self, player_name):
+        if player_name not in self.players:
+            self.players.append(player_name)
+            self.scores[player_name] = 0
+            return True
+        return False
+    
+    def start_tournament(self):
+        if len(self.players) >= 2:
+            self.tournament_active = True
+            return True
+        return False
+    
+    def get_leaderboard(self):
+        return sorted(self.scores.items(), key=lambda x: x[1], reverse=True)
+    
+    def reset_tournament(self):
+        self.players = []
+        self.scores = {}
+        self.tournament_active = False
+
+class MiniGame:
+    def __init__(self, account_manager):
+        self.account_manager = account_manager
+    
+    def number_guessing_game(self):
+        """Simple number guessing game"""
+        window = tk.Toplevel()
+        window.title("Number Guessing Game")
+        window.geometry("300x200")
+        window.configure(bg='#2D2D2D')
+        
+        number = random.randint(1, 100)
+        attempts = 0
+        
+        def check_guess():
+            nonlocal attempts
+            try:
+                guess = int(entry.get())
+                attempts += 1
+                
+                if guess < number:
+                    result_label.config(text="Too low! Try higher.", fg='#FFAA00')
+                elif guess > number:
+                    result_label.config(text="Too high! Try lower.", fg='#FFAA00')
+                else:
+                    result_label.config(text=f"Correct! {attempts} attempts!", fg='#00FF00')
+            except ValueError:
+                result_label.config(text="Enter a valid number!", fg='#FF5555')
+        
+        tk.Label(window, text="Guess number (1-100)", fg='white', bg='#2D2D2D').pack(pady=10)
+        entry = tk.Entry(window, font=('Arial', 12))
+        entry.pack(pady=5)
+        tk.Button(window, text="Submit", command=check_guess, bg='#007ACC', fg='white').pack(pady=5)
+        result_label = tk.Label(window, text="", fg='white', bg='#2D2D2D')
+        result_label.pack(pady=5)
+        return window
+
+class UsernameIndex:
+    def __init__(self, usernames=()):
+        self.rebuild(usernames)
+
+    def rebuild(self, usernames):
+        """Rebuild the sorted index from scratch"""
+        self.names = sorted(usernames, key=str.lower)
+        self.keys = [name.lower() for name in self.names]
+        self._last_query = None
+        self._last_result = None
+
+    def add(self, username):
+        """Insert a username, keeping the index sorted"""
+        key = username.lower()
+        position = bisect.bisect_left(self.keys, key)
+        end = bisect.bisect_right(self.keys, key, lo=position)
+        if username in self.names[position:end]:
+            return
+        self.keys.insert(position, key)
+        self.names.insert(position, username)
+        self._last_query = None
+
+    def remove(self, username):
+        """Remove a username if it is indexed"""
+        key = username.lower()
+        position = bisect.bisect_left(self.keys, key)
+        while position < len(self.keys) and self.keys[position] == key:
+            if self.names[position] == username:
+                del self.keys[position]
+                del self.names[position]
+                self._last_query = None
+                return
+            position += 1
+
+    def prefix(self, text):
+        """Usernames starting with text, via binary search"""
+        key = text.lower()
+        start = bisect.bisect_left(self.keys, key)
+        end = bisect.bisect_left(self.keys, key + "\uffff")
+        return self.names[start:end]
+
+    def search(self, text):
+        """Usernames containing text, those starting with it first; typing more characters narrows the last result"""
+        key = text.lower()
+        if not key:
+            return self.names
+        if self._last_query and key.startswith(self._last_query):
+            candidates = self._last_result
+        else:
+            candidates = range(len(self.keys))
+        keys = self.keys
+        result = [i for i in candidates if key in keys[i]]
+        self._last_query = key
+        self._last_result = result
+        names = self.names
+        return self.prefix(text) + [names[i] for i in result if not keys[i].startswith(key)]
+
+class VirtualListbox(tk.Frame):
+    def __init__(self, master, on_select=None, on_activate=None, format_item=str, **listbox_options):
+        super().__init__(master, bg=listbox_options.get('bg', '#2D2D2D'))
+        self.on_select = on_select
+        self.on_activate = on_activate
+        self.format_item = format_item
+        self.items = []
+        self.top = 0
+        self.rows = 10
+        self.selected = None
+
+        self.listbox = tk.Listbox(self, exportselection=False, activestyle='none', **listbox_options)
+        self.listbox.pack(side='left', fill='both', expand=True)
+        self.scrollbar = tk.Scrollbar(self, command=self.scroll)
+        self.scrollbar.pack(side='right', fill='y')
+
+        self.listbox.bind('<Configure>', self._on_resize)
+        self.listbox.bind('<<ListboxSelect>>', self._on_listbox_select)
+        self.listbox.bind('<Double-Button-1>', self._on_double_click)
+        self.listbox.bind('<MouseWheel>', lambda e: self.scroll('scroll', -1 if e.delta > 0 else 1, 'units'))
+        self.listbox.bind('<Button-4>', lambda e: self.scroll('scroll', -1, 'units'))
+        self.listbox.bind('<Button-5>', lambda e: self.scroll('scroll', 1, 'units'))
+
+    def set_items(self, items):
+        """Replace the backing sequence; only the visible rows are inserted"""
+        self.items = items
+        self.top = 0
+        self.selected = None
+        self.render()
+
+    def extend_items(self, items):
+        """Append rows without moving the view"""
+        self.items.extend(items)
+        self.render()
+
+    def render(self):
+        """Materialise the rows currently in view"""
+        total = len(self.items)
+        self.top = max(0, min(self.top, total - self.rows))
+        visible = [self.format_item(item) for item in self.items[self.top:self.top + self.rows]]
+        self.listbox.delete(0, tk.END)
+        if visible:
+            self.listbox.insert(tk.END, *visible)
+        if self.selected is not None and self.top <= self.selected < self.top + self.rows:
+            self.listbox.selection_set(self.selected - self.top)
+        if total:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + self.rows) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        return "break"
+
+    def scroll(self, action, amount, unit=None):
+        """Scrollbar and mouse wheel handler"""
+        if action == 'moveto':
+            self.top = int(float(amount) * len(self.items))
+        elif action == 'scroll':
+            step = self.rows if unit == 'pages' else 1
+            self.top += int(amount) * step
+        return self.render()
+
+    def _on_resize(self, event):
+        line_height = max(1, tk.font.Font(font=self.listbox.cget('font')).metrics('linespace') + 1)
+        rows = max(1, event.height // line_height)
+        if rows != self.rows:
+            self.rows = rows
+            self.render()
+
+    def _on_listbox_select(self, event):
+        selection = self.listbox.curselection()
+        if not selection:
+            return
+        self.selected = self.top + selection[0]
+        if self.on_select:
+            self.on_select(self.items[self.selected])
+
+    def _on_double_click(self, event):
+        selection = self.listbox.curselection()
+        if selection and self.on_activate:
+            self.on_activate(self.items[self.top + selection[0]])
+
+class SpatialGrid:
+    def __init__(self, cell_size=100):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.bounds = {}
+
+    def _cells(self, x1, y1, x2, y2):
+        size = self.cell_size
+        for cx in range(int(x1 // size), int(x2 // size) + 1):
+            for cy in range(int(y1 // size), int(y2 // size) + 1):
+                yield (cx, cy)
+
+    def insert(self, key, bbox):
+        """Index key under every cell its bounding box touches"""
+        self.remove(key)
+        self.bounds[key] = bbox
+        for cell in self._cells(*bbox):
+            self.cells.setdefault(cell, set()).add(key)
+
+    def remove(self, key):
+        bbox = self.bounds.pop(key, None)
+        if bbox is None:
+            return
+        for cell in self._cells(*bbox):
+            members = self.cells.get(cell)
+            if members:
+                members.discard(key)
+                if not members:
+                    del self.cells[cell]
+
+    def query_point(self, x, y):
+        """Keys whose bounding box contains the point"""
+        cell = (int(x // self.cell_size), int(y // self.cell_size))
+        return [key for key in self.cells.get(cell, ())
+                if self.bounds[key][0] <= x <= self.bounds[key][2] and self.bounds[key][1] <= y <= self.bounds[key][3]]
+
+    def query_rect(self, x1, y1, x2, y2):
+        """Keys whose bounding box intersects the rectangle"""
+        found = set()
+        for cell in self._cells(x1, y1, x2, y2):
+            found.update(self.cells.get(cell, ()))
+        return [key for key in found
+                if self.bounds[key][0] <= x2 and self.bounds[key][2] >= x1
+                and self.bounds[key][1] <= y2 and self.bounds[key][3] >= y1]
+
+class DesktopCanvas(tk.Canvas):
+    ICON_SIZE = 80
+    SNAP = 100
+
+    def __init__(self, master, on_open=None, on_moved=None, **options):
+        super().__init__(master, highlightthickness=0, **options)
+        self.on_open = on_open
+        self.on_moved = on_moved
+        self.grid_index = SpatialGrid(self.SNAP)
+        self.icons = {}
+        self.positions = {}
+        self.order = []
+        self.selected = set()
+        self.drag = None
+        self.band = None
+
+        self.bind('<ButtonPress-1>', self._on_press)
+        self.bind('<Shift-ButtonPress-1>', lambda e: self._on_press(e, extend=True))
+        self.bind('<B1-Motion>', self._on_motion)
+        self.bind('<ButtonRelease-1>', self._on_release)
+        self.bind('<Double-Button-1>', self._on_double_click)
+
+    def add_icon(self, name, x, y):
+        """Draw an icon as canvas items and index it for hit testing"""
+        tag = f"icon{len(self.order)}"
+        size = self.ICON_SIZE
+        self.create_rectangle(x, y, x + size, y + size, fill='#4A4A4A', outline='#666666', tags=(tag, f"{tag}.box"))
+        self.create_text(x + size / 2, y + 28, text="📱", font=('Arial', 20), fill='white', tags=(tag,))
+        self.create_text(x + size / 2, y + 62, text=name, font=('Arial', 10), fill='white', tags=(tag,))
+        self.icons[name] = tag
+        self.positions[name] = (x, y)
+        self.order.append(name)
+        self.grid_index.insert(name, (x, y, x + size, y + size))
+
+    def icon_at(self, x, y):
+        """Topmost icon under the point"""
+        hits = self.grid_index.query_point(x, y)
+        if not hits:
+            return None
+        return max(hits, key=self.order.index)
+
+    def select(self, names, extend=False):
+        if not extend:
+            for name in self.selected:
+                self.itemconfig(f"{self.icons[name]}.box", outline='#666666')
+                self.dtag(self.icons[name], 'selected')
+            self.selected = set()
+        for name in names:
+            self.selected.add(name)
+            self.itemconfig(f"{self.icons[name]}.box", outline='#007ACC')
+            self.addtag_withtag('selected', self.icons[name])
+            self.tag_raise(self.icons[name])
+
+    def _on_press(self, event, extend=False):
+        x, y = self.canvasx(event.x), self.canvasy(event.y)
+        name = self.icon_at(x, y)
+        if name:
+            if name not in self.selected:
+                self.select([name], extend)
+            self.drag = {'x': x, 'y': y, 'dx': 0, 'dy': 0}
+        else:
+            if not extend:
+                self.select([])
+            self.band = (x, y, self.create_rectangle(x, y, x, y, outline='#007ACC', dash=(3, 2)))
+        return "break"
+
+    def _on_motion(self, event):
+        x, y = self.canvasx(event.x), self.canvasy(event.y)
+        if self.drag:
+            step_x, step_y = x - self.drag['x'], y - self.drag['y']
+            self.move('selected', step_x, step_y)
+            self.drag.update(x=x, y=y, dx=self.drag['dx'] + step_x, dy=self.drag['dy'] + step_y)
+        elif self.band:
+            start_x, start_y, item = self.band
+            self.coords(item, start_x, start_y, x, y)
+
+    def _on_release(self, event):
+        if self.drag:
+            drag, self.drag = self.drag, None
+            if drag['dx'] or drag['dy']:
+                size = self.ICON_SIZE
+                for name in self.selected:
+                    old_x, old_y = self.positions[name]
+                    new_x = max(0, round((old_x + drag['dx']) / self.SNAP) * self.SNAP)
+                    new_y = max(0, round((old_y + drag['dy']) / self.SNAP) * self.SNAP)
+                    self.move(self.icons[name], new_x - old_x - drag['dx'], new_y - old_y - drag['dy'])
+                    self.positions[name] = (new_x, new_y)
+                    self.grid_index.insert(name, (new_x, new_y, new_x + size, new_y + size))
+                if self.on_moved:
+                    self.on_moved({name: list(position) for name, position in self.positions.items()})
+        elif self.band:
+            start_x, start_y, item = self.band
+            self.band = None
+            self.delete(item)
+            x, y = self.canvasx(event.x), self.canvasy(event.y)
+            hits = self.grid_index.query_rect(min(start_x, x), min(start_y, y), max(start_x, x), max(start_y, y))
+            self.select(hits, extend=True)
+
+    def _on_double_click(self, event):
+        name = self.icon_at(self.canvasx(event.x), self.canvasy(event.y))
+        if name and self.on_open:
+            self.on_open(name)
+
+class SessionManager:
+    def __init__(self, root, username, directory="ruscat_sessions", interval=2000):
+        self.root = root
+        # Usernames are unrestricted, so hash them rather than trusting them in a path
+        self.path = os.path.join(directory, hashlib.sha256(username.encode()).hexdigest()[:32] + ".session")
+        self.interval = interval
+        self.windows = {}
+        self.records = {}
+        self.focused = None
+        self.next_id = 0
+        self.changed = False
+        self.write_lock = threading.Lock()
+        self.sequence = 0
+        self.written_sequence = 0
+        self.restore_pending = 0
+
+    def track(self, app_name, window, get_state=None):
+        """Include a window in the session snapshot"""
+        for entry in self.windows.values():
+            if entry['window'] is window:
+                if get_state:
+                    entry['get_state'] = get_state
+                return
+        window_id = self.next_id
+        self.next_id += 1
+        self.windows[window_id] = {'app': app_name, 'window': window, 'get_state': get_state, 'dirty': True}
+        if self.focused is None:
+            self.focused = window_id
+        self.changed = True
+
+        def on_toplevel(handler):
+            return lambda e: handler(window_id) if e.widget is window else None
+
+        window.bind('<Configure>', on_toplevel(self.mark_dirty), add='+')
+        window.bind('<FocusIn>', on_toplevel(self._on_focus), add='+')
+        window.bind('<KeyRelease>', lambda e: self.mark_dirty(window_id), add='+')
+        window.bind('<Destroy>', on_toplevel(self._forget), add='+')
+
+    def mark_dirty(self, window_id):
+        entry = self.windows.get(window_id)
+        if entry:
+            entry['dirty'] = True
+
+    def _on_focus(self, window_id):
+        if self.focused != window_id:
+            self.focused = window_id
+            self.changed = True
+
+    def _forget(self, window_id):
+        if self.windows.pop(window_id, None):
+            self.records.pop(window_id, None)
+            if self.focused == window_id:
+                self.focused = None
+            self.changed = True
+
+    def _collect(self):
+        """Re-read only the windows that changed since the last snapshot"""
+        for window_id, entry in self.windows.items():
+            if not entry['dirty']:
+                continue
+            entry['dirty'] = False
+            try:
+                record = {'app': entry['app'], 'geometry': entry['window'].geometry()}
+                if entry['get_state']:
+                    record['state'] = entry['get_state']()
+            except tk.TclError:
+                continue
+            if self.records.get(window_id) != record:
+                self.records[window_id] = record
+                self.changed = True
+        if not self.changed:
+            return None
+        self.changed = False
+        ordered = sorted(self.records, key=lambda window_id: window_id != self.focused)
+        return {'windows': [self.records[window_id] for window_id in ordered]}
+
+    def _write(self, snapshot, sequence):
+        """Write a snapshot unless a newer one has already been written"""
+        data = zlib.compress(json.dumps(snapshot, separators=(',', ':')).encode())
+        with self.write_lock:
+            if sequence <= self.written_sequence:
+                return
+            self.written_sequence = sequence
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                temp_path = self.path + ".tmp"
+                with open(temp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(temp_path, self.path)
+            except OSError:
+                pass
+
+    def start(self):
+        """Snapshot changed windows periodically; files are written off the Tk thread"""
+        snapshot = self._collect()
+        if snapshot is not None:
+            self.sequence += 1
+            threading.Thread(target=self._write, args=(snapshot, self.sequence), daemon=True).start()
+        self.root.after(self.interval, self.start)
+
+    def save_now(self):
+        """Write a final snapshot synchronously"""
+        for entry in self.windows.values():
+            entry['dirty'] = True
+        self.changed = True
+        self.sequence += 1
+        self._write(self._collect(), self.sequence)
+
+    def load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                return json.loads(zlib.decompress(f.read()))
+        except (OSError, ValueError, zlib.error):
+            return None
+
+    def restore(self, open_app, on_done=None):
+        """Reopen the focused window now and the rest one per idle slot"""
+        snapshot = self.load()
+        records = snapshot['windows'] if snapshot else []
+        self.restore_pending = len(records)
+
+        def reopen(record):
+            window = open_app(record['app'], **record.get('state', {}))
+            if window is not None:
+                try:
+                    window.geometry(record['geometry'])
+                except tk.TclError:
+                    pass
+            self.restore_pending -= 1
+
+        def restore_next(remaining):
+            if remaining:
+                reopen(remaining[0])
+                self.root.after_idle(lambda: self.root.after(1, restore_next, remaining[1:]))
+            elif on_done:
+                on_done(len(records))
+
+        if records:
+            reopen(records[0])
+        self.root.after_idle(lambda: self.root.after(1, restore_next, records[1:]))
+        return len(records)
+
+class LruCache:
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+class FileManagerWindow:
+    CHUNK_SIZE = 500
+    IMAGE_TYPES = ('.png', '.gif', '.ppm', '.pgm')
+
+    def __init__(self, root, metadata_cache, path=None, on_file_opened=None):
+        self.root = root
+        self.on_file_opened = on_file_opened
+        self.metadata_cache = metadata_cache
+        self.path = os.path.abspath(path or os.getcwd())
+        self.entries = {}
+        self.sorted = False
+        self.generation = 0
+        self.updates = deque()
+        self.watcher = None
+        self.listing_started = 0
+
+        self.window = tk.Toplevel(root)
+        self.window.title("File Manager")
+        self.window.geometry("700x450")
+        self.window.configure(bg='#2D2D2D')
+
+        top_frame = tk.Frame(self.window, bg='#2D2D2D')
+        top_frame.pack(fill='x', padx=10, pady=10)
+        tk.Button(top_frame, text="⬆ Up", command=self.go_up, bg='#007ACC', fg='white').pack(side='left')
+        self.path_var = tk.StringVar(value=self.path)
+        path_entry = tk.Entry(top_frame, textvariable=self.path_var, font=('Arial', 10))
+        path_entry.pack(side='left', fill='x', expand=True, padx=5)
+        path_entry.bind('<Return>', lambda e: self.navigate(self.path_var.get()))
+
+        self.status_label = tk.Label(self.window, text="", fg='#AAAAAA', bg='#2D2D2D', font=('Arial', 9))
+        self.status_label.pack(anchor='w', padx=10)
+
+        body = tk.Frame(self.window, bg='#2D2D2D')
+        body.pack(fill='both', expand=True, padx=10, pady=(0, 10))
+
+        details = tk.Frame(body, bg='#1A1A1A', width=240)
+        details.pack(side='right', fill='y', padx=(5, 0))
+        details.pack_propagate(False)
+        self.thumbnail_label = tk.Label(details, bg='#1A1A1A')
+        self.thumbnail_label.pack(pady=5)
+        self.details_text = tk.Text(details, bg='#1A1A1A', fg='#00FF00', font=('Consolas', 9), state='disabled')
+        self.details_text.pack(fill='both', expand=True)
+
+        self.file_list = VirtualListbox(
+            body, on_select=self.show_details, on_activate=self.activate, format_item=self.format_entry,
+            bg='#2D2D2D', fg='white', font=('Arial', 10)
+        )
+        self.file_list.pack(side='left', fill='both', expand=True)
+
+        self.window.bind('<Destroy>', lambda e: self.close() if e.widget is self.window else None)
+        self.navigate(self.path)
+        self.process_updates()
+
+    def format_entry(self, name):
+        return ("📁 " if self.entries.get(name) else "📄 ") + name
+
+    def sort_key(self, name):
+        return (not self.entries.get(name), name.lower())
+
+    def navigate(self, path):
+        """List a directory in a worker thread and watch it for changes"""
+        path = os.path.abspath(os.path.expanduser(path))
+        if not os.path.isdir(path):
+            messagebox.showerror("Error", f"Not a directory: {path}")
+            self.path_var.set(self.path)
+            return
+        self.path = path
+        self.path_var.set(path)
+        self.generation += 1
+        self.entries = {}
+        self.sorted = False
+        self.file_list.set_items([])
+        self.listing_started = time.perf_counter()
+
+        if self.watcher:
+            self.watcher.stop()
+        generation = self.generation
+        self.watcher = DirectoryWatcher(path, lambda events: self.updates.append(('changed', generation, events)))
+        self.watcher.start()
+        threading.Thread(target=self._scan, args=(path, generation), daemon=True).start()
+
+    def _scan(self, path, generation):
+        """Worker thread: stream scandir results back in chunks"""
+        chunk = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if generation != self.generation:
+                        return
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    chunk.append((entry.name, is_dir))
+                    if len(chunk) >= self.CHUNK_SIZE:
+                        self.updates.append(('entries', generation, chunk))
+                        chunk = []
+        except OSError as e:
+            self.updates.append(('error', generation, str(e)))
+        self.updates.append(('entries', generation, chunk))
+        self.updates.append(('done', generation, None))
+
+    def process_updates(self):
+        """Apply worker and watcher updates on the Tk thread within a small time budget"""
+        if not self.window.winfo_exists():
+            return
+        deadline = time.perf_counter() + 0.010
+        while self.updates and time.perf_counter() < deadline:
+            kind, generation, payload = self.updates.popleft()
+            if generation != self.generation:
+                continue
+            if kind == 'entries':
+                names = []
+                for name, is_dir in payload:
+                    if name not in self.entries:
+                        names.append(name)
+                    self.entries[name] = is_dir
+                self.file_list.extend_items(names)
+                self.update_status()
+            elif kind == 'done':
+                self.file_list.items.sort(key=self.sort_key)
+                self.sorted = True
+                self.file_list.render()
+                self.update_status(done=True)
+            elif kind == 'error':
+                self.status_label.config(text=f"Error: {payload}")
+            elif kind == 'changed':
+                self.apply_changes(payload)
+        self.window.after(30, self.process_updates)
+
+    def apply_changes(self, events):
+        """Update only the entries named in the watcher events"""
+        if events is None:
+            self.navigate(self.path)
+            return
+        items = self.file_list.items
+        for name in {name for _, name in events if name}:
+            try:
+                is_dir = stat.S_ISDIR(os.lstat(os.path.join(self.path, name)).st_mode)
+            except OSError:
+                is_dir = None
+            if name in self.entries:
+                position = self._find(name)
+                if position is not None:
+                    del items[position]
+                del self.entries[name]
+            if is_dir is not None:
+                self.entries[name] = is_dir
+                if self.sorted:
+                    items.insert(self._insert_position(name), name)
+                else:
+                    items.append(name)
+        self.file_list.render()
+        self.update_status()
+
+    def _insert_position(self, name):
+        key = self.sort_key(name)
+        items = self.file_list.items
+        low, high = 0, len(items)
+        while low < high:
+            middle = (low + high) // 2
+            if self.sort_key(items[middle]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _find(self, name):
+        items = self.file_list.items
+        if self.sorted:
+            position = self._insert_position(name)
+            if position < len(items) and items[position] == name:
+                return position
+        return items.index(name) if name in items else None
+
+    def update_status(self, done=False):
+        text = f"{len(self.entries)} items"
+        if done:
+            text += f" (listed in {(time.perf_counter() - self.listing_started) * 1000:.0f} ms)"
+        self.status_label.config(text=text)
+
+    def go_up(self):
+        self.navigate(os.path.dirname(self.path))
+
+    def activate(self, name):
+        if self.entries.get(name):
+            self.navigate(os.path.join(self.path, name))
+        elif name in self.entries and self.on_file_opened:
+            self.on_file_opened(os.path.join(self.path, name))
+
+    def metadata(self, name):
+        """Stat-based details and a thumbnail, cached by inode and mtime"""
+        path = os.path.join(self.path, name)
+        info = os.stat(path)
+        key = (info.st_dev, info.st_ino, info.st_mtime_ns)
+        cached = self.metadata_cache.get(key)
+        if cached is not None:
+            return cached
+        details = {
+            'name': name,
+            'size': info.st_size,
+            'modified': datetime.fromtimestamp(info.st_mtime).strftime("%Y-%m-%d %H:%M:%S"),
+            'type': "Folder" if stat.S_ISDIR(info.st_mode) else (os.path.splitext(name)[1] or "File"),
+            'thumbnail': None,
+            'preview': ""
+        }
+        if stat.S_ISREG(info.st_mode):
+            if name.lower().endswith(self.IMAGE_TYPES):
+                try:
+                    image = tk.PhotoImage(file=path)
+                    factor = max(1, max(image.width(), image.height()) // 128)
+                    details['thumbnail'] = image.subsample(factor) if factor > 1 else image
+                except tk.TclError:
+                    pass
+            else:
+                try:
+                    with open(path, 'r', errors='replace') as f:
+                        details['preview'] = f.read(1024)
+                except OSError:
+                    pass
+        self.metadata_cache.put(key, details)
+        return details
+
+    def show_details(self, name):
+        try:
+            details = self.metadata(name)
+        except OSError as e:
+            details = {'name': name, 'size': "?", 'modified': "?", 'type': str(e), 'thumbnail': None, 'preview': ""}
+        self.thumbnail_label.config(image=details['thumbnail'] or "")
+        self.details_text.config(state='normal')
+        self.details_text.delete('1.0', tk.END)
+        self.details_text.insert(tk.END, (
+            f"Name: {details['name']}\nType: {details['type']}\n"
+            f"Size: {details['size']} bytes\nModified: {details['modified']}\n\n{details['preview']}"
+        ))
+        self.details_text.config(state='disabled')
+
+    def close(self):
+        self.generation += 1
+        if self.watcher:
+            self.watcher.stop()
+
+class TerminalScreen:
+    ESCAPE = re.compile(r'\x1b\[[0-9;?]*[ -/]*[@-~]|\x1b\][^\x07\x1b]*(?:\x07|\x1b\\)|\x1b[ -/]*[0-Z\\^-~]')
+    TOKENS = re.compile(ESCAPE.pattern + r'|[\x00-\x1f\x7f]')
+    NOT_PLAIN = re.compile(r'[\x00-\x09\x0b\x0c\x0e-\x1f\x7f]')
+
+    def __init__(self, rows=24, cols=80, scrollback=1000):
+        self.rows = rows
+        self.cols = cols
+        self.lines = [[' '] * cols for _ in range(rows)]
+        self.row = 0
+        self.col = 0
+        self.scrollback = deque(maxlen=scrollback)
+        self.scrolled = 0
+        self.dirty = set(range(rows))
+        self.pending = ""
+        self.lock = threading.Lock()
+
+    def feed(self, text):
+        """Apply terminal output; an escape split across reads is held back"""
+        with self.lock:
+            text = self.pending + text
+            self.pending = ""
+            escape_start = text.rfind('\x1b')
+            if escape_start != -1 and not self.ESCAPE.match(text, escape_start) and len(text) - escape_start < 64:
+                self.pending = text[escape_start:]
+                text = text[:escape_start]
+            if not self.NOT_PLAIN.search(text):
+                self._feed_plain(text)
+                return
+            position = 0
+            for match in self.TOKENS.finditer(text):
+                if match.start() > position:
+                    self._write(text[position:match.start()])
+                self._control(match.group())
+                position = match.end()
+            if position < len(text):
+                self._write(text[position:])
+
+    def _feed_plain(self, text):
+        """Fast path for output made only of text, CR and LF (e.g. `yes` or `cat`)"""
+        lines = text.split('\n')
+        keep = self.rows + self.scrollback.maxlen
+        # Lines that would scroll past the end of the scrollback are never drawn
+        if len(lines) - 2 > keep:
+            self._write_plain_line(lines[0])
+            self._line_feed()
+            skipped = len(lines) - 2 - keep
+            self.scrolled += skipped
+            self.row, self.col = self.rows - 1, 0
+            lines = lines[1 + skipped:]
+        for line in lines[:-1]:
+            self._write_plain_line(line)
+            self._line_feed()
+        self._write_plain_line(lines[-1])
+
+    def _write_plain_line(self, line):
+        if '\r' not in line:
+            self._write(line)
+            return
+        for index, part in enumerate(line.split('\r')):
+            if index:
+                self.col = 0
+            self._write(part)
+
+    def _write(self, run):
+        cols = self.cols
+        while run:
+            if self.col >= cols:
+                self.col = 0
+                self._line_feed()
+            part = run[:cols - self.col]
+            self.lines[self.row][self.col:self.col + len(part)] = part
+            self.dirty.add(self.row)
+            self.col += len(part)
+            run = run[len(part):]
+
+    def _line_feed(self):
+        if self.row < self.rows - 1:
+            self.row += 1
+            return
+        self.scrollback.append(''.join(self.lines.pop(0)).rstrip())
+        self.lines.append([' '] * self.cols)
+        self.scrolled += 1
+        self.dirty.update(range(self.rows))
+
+    def _erase(self, row, start, end):
+        self.lines[row][start:end] = [' '] * (end - start)
+        self.dirty.add(row)
+
+    def _control(self, token):
+        if token == '\n':
+            self._line_feed()
+        elif token == '\r':
+            self.col = 0
+        elif token == '\b':
+            self.col = max(0, self.col - 1)
+        elif token == '\t':
+            self.col = min(self.cols - 1, (self.col // 8 + 1) * 8)
+        elif token.startswith('\x1b[') and not token.startswith('\x1b[?'):
+            final = token[-1]
+            params = [int(value) if value.isdigit() else 0 for value in token[2:-1].split(';')]
+            count = max(1, params[0])
+            if final == 'A':
+                self.row = max(0, self.row - count)
+            elif final == 'B':
+                self.row = min(self.rows - 1, self.row + count)
+            elif final == 'C':
+                self.col = min(self.cols - 1, self.col + count)
+            elif final == 'D':
+                self.col = max(0, self.col - count)
+            elif final in 'Hf':
+                self.row = min(self.rows - 1, max(1, params[0]) - 1)
+                self.col = min(self.cols - 1, max(1, params[1] if len(params) > 1 else 1) - 1)
+            elif final == 'K':
+                start, end = {0: (self.col, self.cols), 1: (0, self.col + 1)}.get(params[0], (0, self.cols))
+                self._erase(self.row, start, end)
+            elif final == 'J':
+                if params[0] == 0:
+                    self._erase(self.row, self.col, self.cols)
+                    rows = range(self.row + 1, self.rows)
+                elif params[0] == 1:
+                    self._erase(self.row, 0, self.col + 1)
+                    rows = range(0, self.row)
                 else:
-                    messagebox.showwarning("Not Supported", "Shutdown not supported")
-        except Exception as e:
-            messagebox.showerror("Error", f"Shutdown failed: {e}")
+                    rows = range(self.rows)
+                for row in rows:
+                    self._erase(row, 0, self.cols)
+        # Colours, private modes, OSC titles and bells are ignored
+
+    def take_changes(self):
+        """Lines that scrolled off and (index, text) of dirty screen lines since the last call"""
+        with self.lock:
+            scrolled = list(self.scrollback)[-self.scrolled:] if self.scrolled else []
+            self.scrolled = 0
+            dirty = [(row, ''.join(self.lines[row]).rstrip()) for row in sorted(self.dirty)]
+            self.dirty.clear()
+            return scrolled, dirty, (self.row, self.col)
+
+class TerminalWindow:
+    FRAME_INTERVAL = 33
+    KEYS = {
+        'Return': '\r', 'BackSpace': '\x7f', 'Tab': '\t', 'Escape': '\x1b',
+        'Up': '\x1b[A', 'Down': '\x1b[B', 'Right': '\x1b[C', 'Left': '\x1b[D',
+        'Home': '\x1b[H', 'End': '\x1b[F', 'Delete': '\x1b[3~'
+    }
+
+    def __init__(self, root, scrollback=1000, rows=24, cols=80):
+        self.root = root
+        self.screen = TerminalScreen(rows, cols, scrollback)
+        self.scrollback_lines = 0
+        self.running = True
+        # Start the shell before building any widgets, so a failure leaves no window behind
+        self.master_fd, self.process = self._spawn(rows, cols)
+
+        self.window = tk.Toplevel(root)
+        self.window.title("Terminal")
+        self.window.configure(bg='#000000')
+        self.text = tk.Text(self.window, bg='#000000', fg='#00FF00', insertbackground='#00FF00',
+                            font=('Consolas', 10), width=cols, height=rows, wrap='none')
+        self.text.pack(fill='both', expand=True)
+        self.text.insert('1.0', "\n" * (rows - 1))
+        self.text.bind('<Key>', self.on_key)
+        self.text.focus_set()
+
+        threading.Thread(target=self._read, daemon=True).start()
+        self.window.bind('<Destroy>', lambda e: self.close() if e.widget is self.window else None)
+        self.render()
 
     @staticmethod
-    def restart():
-        """Restart the computer"""
+    def _spawn(rows, cols):
+        """Open a pty and start the user's shell on it; closes both ends if the shell can't start"""
+        master_fd, slave_fd = pty.openpty()
         try:
-            if messagebox.askyesno("Restart", "Are you sure you want to restart?"):
-                print("🔄 Restarting system...")
-                if os.name == 'nt':
-                    os.system("shutdown /r /t 0")
-                elif sys.platform.startswith('linux'):
-                    os.system("reboot")
-                elif sys.platform == "darwin":
-                    os.system("shutdown -r now")
-                else:
-                    messagebox.showwarning("Not Supported", "Restart not supported")
-        except Exception as e:
-            messagebox.showerror("Error", f"Restart failed: {e}")
+            termios_size = struct.pack('HHHH', rows, cols, 0, 0)
+            fcntl.ioctl(slave_fd, termios.TIOCSWINSZ, termios_size)
+            shell = os.environ.get('SHELL', '/bin/sh')
+            process = subprocess.Popen(
+                [shell], stdin=slave_fd, stdout=slave_fd, stderr=slave_fd,
+                env=dict(os.environ, TERM='vt100'), start_new_session=True, close_fds=True
+            )
+        except BaseException:
+            os.close(master_fd)
+            raise
+        finally:
+            os.close(slave_fd)
+        return master_fd, process
 
-class TournamentManager:
-    def __init__(self, account_manager):
-        self.account_manager = account_manager
-        self.players = []
-        self.scores = {}
-        self.tournament_active = False
-        
-    def add_player(self, player_name):
-        if player_name not in self.players:
-            self.players.append(player_name)
-            self.scores[player_name] = 0
-            return True
-        return False
-    
-    def start_tournament(self):
-        if len(self.players) >= 2:
-            self.tournament_active = True
-            return True
-        return False
-    
-    def get_leaderboard(self):
-        return sorted(self.scores.items(), key=lambda x: x[1], reverse=True)
-    
-    def reset_tournament(self):
-        self.players = []
-        self.scores = {}
-        self.tournament_active = False
+    def _read(self):
+        """Reader thread: parse output into the screen model as fast as it arrives, then reap the shell"""
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        while self.running:
+            try:
+                data = os.read(self.master_fd, 65536)
+            except OSError:
+                break
+            if not data:
+                break
+            self.screen.feed(decoder.decode(data))
+        self.screen.feed("\r\n[process exited]\r\n")
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except OSError:
+                pass
+            self.process.wait()
 
-class MiniGame:
-    def __init__(self, account_manager):
-        self.account_manager = account_manager
-    
-    def number_guessing_game(self):
-        """Simple number guessing game"""
-        window = tk.Toplevel()
-        window.title("Number Guessing Game")
-        window.geometry("300x200")
-        window.configure(bg='#2D2D2D')
-        
-        number = random.randint(1, 100)
-        attempts = 0
-        
-        def check_guess():
-            nonlocal attempts
+    def render(self):
+        """Repaint only changed lines, at most once per frame"""
+        if not self.running:
+            return
+        scrolled, dirty, (row, col) = self.screen.take_changes()
+        limit = self.screen.scrollback.maxlen
+        if scrolled:
+            self.text.insert(f"{self.scrollback_lines + 1}.0", "\n".join(scrolled) + "\n")
+            self.scrollback_lines += len(scrolled)
+            if self.scrollback_lines > limit:
+                excess = self.scrollback_lines - limit
+                self.text.delete('1.0', f"{excess + 1}.0")
+                self.scrollback_lines = limit
+        base = self.scrollback_lines + 1
+        for index, line in dirty:
+            self.text.delete(f"{base + index}.0", f"{base + index}.end")
+            self.text.insert(f"{base + index}.0", line)
+        if scrolled or dirty:
+            self.text.mark_set('insert', f"{base + row}.{col}")
+            self.text.see('insert')
+        self.window.after(self.FRAME_INTERVAL, self.render)
+
+    def on_key(self, event):
+        data = self.KEYS.get(event.keysym, event.char)
+        if data:
             try:
-                guess = int(entry.get())
-                attempts += 1
-                
-                if guess < number:
-                    result_label.config(text="Too low! Try higher.", fg='#FFAA00')
-                elif guess > number:
-                    result_label.config(text="Too high! Try lower.", fg='#FFAA00')
-                else:
-                    result_label.config(text=f"Correct! {attempts} attempts!", fg='#00FF00')
-            except ValueError:
-                result_label.config(text="Enter a valid number!", fg='#FF5555')
-        
-        tk.Label(window, text="Guess number (1-100)", fg='white', bg='#2D2D2D').pack(pady=10)
-        entry = tk.Entry(window, font=('Arial', 12))
-        entry.pack(pady=5)
-        tk.Button(window, text="Submit", command=check_guess, bg='#007ACC', fg='white').pack(pady=5)
-        result_label = tk.Label(window, text="", fg='white', bg='#2D2D2D')
-        result_label.pack(pady=5)
+                os.write(self.master_fd, data.encode())
+            except OSError:
+                pass
+        return "break"
+
+    def close(self):
+        if not self.running:
+            return
+        self.running = False
+        try:
+            os.killpg(self.process.pid, signal.SIGHUP)
+        except OSError:
+            pass
+        try:
+            os.close(self.master_fd)
+        except OSError:
+            pass
+
+class SearchIndex:
+    TOKEN = re.compile(r'[A-Z]?[a-z]+|[A-Z]+(?![a-z])|[0-9]+|[^\W_]+')
+    FUZZY_PREFIX = 4
+    CANDIDATE_LIMIT = 1000
+    SCAN_LIMIT = 5000
+    TERM_TOKENS = 256
+    SMALL_SOURCE = 1000
+    BULK_THRESHOLD = 1000
+
+    def __init__(self, source_weights=None):
+        self.source_weights = source_weights or {}
+        self.items = {}
+        self.keys = {}
+        self.source_items = {}
+        self.postings = {}
+        self.tokens = []
+        self.prefix_counts = {}
+        self.alphabet = set()
+        self.next_id = 0
+        self.pending = deque()
+
+    @classmethod
+    def tokenize(cls, text):
+        """Lowercased words, plus the camelCase parts of each word"""
+        tokens = {word.lower() for word in re.findall(r'[^\W_]+', text)}
+        tokens.update(part.lower() for part in cls.TOKEN.findall(text))
+        return tokens
+
+    def _add_prefix(self, token):
+        prefix = token[:self.FUZZY_PREFIX]
+        self.prefix_counts[prefix] = self.prefix_counts.get(prefix, 0) + 1
+        self.alphabet.update(token)
+
+    def _remove_prefix(self, token):
+        prefix = token[:self.FUZZY_PREFIX]
+        count = self.prefix_counts[prefix] - 1
+        if count:
+            self.prefix_counts[prefix] = count
+        else:
+            del self.prefix_counts[prefix]
+
+    def add_many(self, source, entries):
+        """Insert or update (key, title, payload) entries from one source; a repeated key keeps its last entry"""
+        new_tokens = []
+        latest = {}
+        for key, title, payload in entries:
+            latest.pop(key, None)
+            latest[key] = (title, payload)
+        for key, (title, payload) in latest.items():
+            item_id = self.keys.get((source, key))
+            if item_id is not None:
+                if self.items[item_id]['title'] == title:
+                    self.items[item_id]['payload'] = payload
+                    continue
+                self.remove(source, key)
+            item_id = self.next_id
+            self.next_id += 1
+            tokens = self.tokenize(title)
+            self.items[item_id] = {'source': source, 'key': key, 'title': title, 'payload': payload, 'tokens': tokens}
+            self.keys[(source, key)] = item_id
+            self.source_items.setdefault(source, set()).add(item_id)
+            for token in tokens:
+                posting = self.postings.get(token)
+                if posting is None:
+                    posting = self.postings[token] = set()
+                    new_tokens.append(token)
+                    self._add_prefix(token)
+                posting.add(item_id)
+        if len(new_tokens) > self.BULK_THRESHOLD:
+            self.tokens.extend(new_tokens)
+            self.tokens.sort()
+        else:
+            for token in new_tokens:
+                bisect.insort(self.tokens, token)
+
+    def add(self, source, key, title, payload=None):
+        self.add_many(source, [(key, title, payload)])
+
+    def push(self, operation, *args):
+        """Queue an update from any thread; it is applied before the next search"""
+        self.pending.append((operation, args))
+
+    def apply_pending(self):
+        while self.pending:
+            operation, args = self.pending.popleft()
+            getattr(self, operation)(*args)
+
+    def remove(self, source, key):
+        item_id = self.keys.pop((source, key), None)
+        if item_id is None:
+            return
+        item = self.items.pop(item_id)
+        self.source_items[source].discard(item_id)
+        for token in item['tokens']:
+            posting = self.postings[token]
+            posting.discard(item_id)
+            if not posting:
+                del self.postings[token]
+                del self.tokens[bisect.bisect_left(self.tokens, token)]
+                self._remove_prefix(token)
+
+    def replace_source(self, source, entries):
+        """Make the index hold exactly these entries for a source, touching only what changed"""
+        entries = list(entries)
+        wanted = {key for key, title, payload in entries}
+        for indexed_source, key in [item for item in self.keys if item[0] == source]:
+            if key not in wanted:
+                self.remove(indexed_source, key)
+        self.add_many(source, entries)
+
+    def _prefix_tokens(self, prefix):
+        tokens = self.tokens
+        position = bisect.bisect_left(tokens, prefix)
+        while position < len(tokens) and tokens[position].startswith(prefix):
+            yield tokens[position]
+            position += 1
+
+    def _one_edit_prefixes(self, term):
+        """Every string one deletion, substitution or insertion away from term.
+
+        A token matches fuzzily when it starts with one of these, so each is a
+        bounded prefix walk. Edits whose first letters no token has are skipped.
+        """
+        edits = {term[:-1]}
+        for position in range(len(term) + 1):
+            if position < len(term) - 1:
+                edits.add(term[:position] + term[position + 1:])
+            for letter in self.alphabet:
+                if position < len(term) - 1:
+                    edits.add(term[:position] + letter + term[position + 1:])
+                edits.add(term[:position] + letter + term[position:])
+        edits.discard(term)
+        return [edit for edit in edits
+                if len(edit) < self.FUZZY_PREFIX or edit[:self.FUZZY_PREFIX] in self.prefix_counts]
+
+    def _fuzzy_tokens(self, term):
+        """Tokens starting within one edit of the term"""
+        seen = set()
+        for edit in self._one_edit_prefixes(term):
+            for token in self._prefix_tokens(edit):
+                if token not in seen:
+                    seen.add(token)
+                    yield token
+
+    def _term_tokens(self, term):
+        """Indexed tokens the term matches by prefix, or by one edit if none does.
+
+        Returns (tokens, fuzzy); tokens is None when the prefix is too broad to
+        list, in which case items are checked with startswith instead.
+        """
+        tokens = list(itertools.islice(self._prefix_tokens(term), self.TERM_TOKENS + 1))
+        if len(tokens) > self.TERM_TOKENS:
+            return None, False
+        if tokens or len(term) < 3:
+            return tokens, False
+        return list(itertools.islice(self._fuzzy_tokens(term), self.TERM_TOKENS)), True
+
+    def _candidates(self, term, tokens, accepts):
+        """Up to CANDIDATE_LIMIT items that accepts() passes, examining at most SCAN_LIMIT.
+
+        Items carrying the exact term come first, so the cap rarely drops the
+        best matches of a common word.
+        """
+        if tokens is None:
+            tokens = self._prefix_tokens(term)
+        elif term in self.postings:
+            tokens = [term] + [token for token in tokens if token != term]
+        found = set()
+        examined = 0
+        for token in tokens:
+            for item_id in self.postings[token]:
+                examined += 1
+                if accepts(item_id):
+                    found.add(item_id)
+                    if len(found) >= self.CANDIDATE_LIMIT:
+                        return found
+                if examined >= self.SCAN_LIMIT:
+                    return found
+        return found
+
+    def search(self, query, limit=10):
+        """Ranked items matching every query word by prefix, or within one edit when no prefix matches"""
+        self.apply_pending()
+        terms = list(dict.fromkeys(term.lower() for term in re.findall(r'[^\W_]+', query)))
+        if not terms:
+            return []
+        plans = []
+        for term in terms:
+            tokens, term_fuzzy = self._term_tokens(term)
+            if tokens == []:
+                return []
+            size = sum(len(self.postings[token]) for token in tokens) if tokens is not None else float('inf')
+            plans.append((size, term, tokens, term_fuzzy))
+        # Drive the lookup from the most selective term and check the others per item
+        plans.sort(key=lambda plan: (plan[0], -len(plan[1])))
+        size, driver, driver_tokens, fuzzy = plans[0]
+        fuzzy = any(plan[3] for plan in plans)
+        checks = [(term, set(tokens) if tokens is not None else None) for _, term, tokens, _ in plans[1:]]
+        items = self.items
+
+        def matches(item_tokens, term, token_set):
+            if token_set is not None:
+                return not item_tokens.isdisjoint(token_set)
+            return any(token.startswith(term) for token in item_tokens)
+
+        def accepts(item_id):
+            item_tokens = items[item_id]['tokens']
+            return all(matches(item_tokens, term, token_set) for term, token_set in checks)
+
+        candidates = self._candidates(driver, driver_tokens, accepts)
+        # Small sources such as apps are checked directly so large ones cannot crowd them out
+        driver_set = set(driver_tokens) if driver_tokens is not None else None
+        for source, item_ids in self.source_items.items():
+            if len(item_ids) <= self.SMALL_SOURCE:
+                candidates.update(
+                    item_id for item_id in item_ids
+                    if matches(items[item_id]['tokens'], driver, driver_set) and accepts(item_id)
+                )
+
+        lowered_query = query.strip().lower()
+        scored = []
+        for item_id in candidates:
+            item = items[item_id]
+            title = item['title'].lower()
+            score = self.source_weights.get(item['source'], 0)
+            if title.startswith(lowered_query):
+                score += 5
+            if driver in item['tokens']:
+                score += 3
+            if fuzzy:
+                score -= 2
+            score -= len(title) / 100
+            scored.append((score, item_id))
+        return [items[item_id] for score, item_id in heapq.nlargest(limit, scored)]
 
 class DeveloperTools:
     def __init__(self, account_manager, root):
         self.account_manager = account_manager
         self.root = root
         self.network_manager = NetworkManager()
+        self.can_scheduler = CanTransmitScheduler(self.network_manager)
+        self.traffic_generator = None
+        self.can_notices = deque()
+        self.network_window = None
     
     def show_network_manager(self):
-        """Show network management interface"""
+        """Show network management interface; there is one window, since its widgets live on self"""
+        if self.network_window and self.network_window.winfo_exists():
+            self.network_window.deiconify()
+            self.network_window.lift()
+            self.network_window.focus_force()
+            return self.network_window
         window = tk.Toplevel(self.root)
+        self.network_window = window
         window.title("🌐 Network Manager")
-        window.geometry("600x500")
+        window.geometry("600x650")
         window.configure(bg='#1E1E1E')
         
         notebook = ttk.Notebook(window)
@@ -403,6 +3622,22 @@ class DeveloperTools:
         self.devices_tree.heading('Status', text='Status')
         self.devices_tree.pack(fill='x', padx=10, pady=5)
         
+        # Acceptance filter and per-ID statistics
+        filter_frame = tk.Frame(can_frame, bg='#1E1E1E')
+        filter_frame.pack(fill='x', padx=10)
+        tk.Label(filter_frame, text="Filter:", fg='white', bg='#1E1E1E').pack(side='left')
+        self.filter_entry = tk.Entry(filter_frame, width=40)
+        self.filter_entry.pack(side='left', padx=5)
+        tk.Button(filter_frame, text="Apply", command=self.apply_can_filter, bg='#007ACC', fg='white').pack(side='left', padx=5)
+        
+        self.stats_tree = ttk.Treeview(can_frame, columns=('ID', 'Frames', 'Rate', 'Load', 'Age'), show='headings', height=4)
+        for column, title in (('ID', 'ID'), ('Frames', 'Frames'), ('Rate', 'Frames/s'), ('Load', 'Bus Load'), ('Age', 'Last Seen')):
+            self.stats_tree.heading(column, text=title)
+            self.stats_tree.column(column, width=90)
+        self.stats_tree.pack(fill='x', padx=10, pady=5)
+        self.channel_label = tk.Label(can_frame, text="", fg='#AAAAAA', bg='#1E1E1E', font=('Arial', 9))
+        self.channel_label.pack(anchor='w', padx=10)
+        
         # CAN messages
         msg_frame = tk.Frame(can_frame, bg='#1E1E1E')
         msg_frame.pack(fill='both', expand=True, padx=10, pady=10)
@@ -416,8 +3651,29 @@ class DeveloperTools:
         tk.Button(control_frame, text="Send", command=self.send_can_message, bg='#007ACC', fg='white').pack(side='left', padx=5)
         tk.Button(control_frame, text="Scan Devices", command=self.scan_can_devices, bg='#00AA00', fg='white').pack(side='left', padx=5)
         
+        cyclic_frame = tk.Frame(can_frame, bg='#1E1E1E')
+        cyclic_frame.pack(fill='x', padx=10, pady=5)
+        tk.Label(cyclic_frame, text="Period (ms):", fg='white', bg='#1E1E1E').pack(side='left')
+        self.period_entry = tk.Entry(cyclic_frame, width=8)
+        self.period_entry.insert(0, "100")
+        self.period_entry.pack(side='left', padx=5)
+        tk.Button(cyclic_frame, text="Start Cyclic", command=self.start_cyclic_message, bg='#007ACC', fg='white').pack(side='left', padx=5)
+        tk.Button(cyclic_frame, text="Stop Cyclic", command=self.stop_cyclic_message, bg='#FF5555', fg='white').pack(side='left', padx=5)
+        
+        traffic_frame = tk.Frame(can_frame, bg='#1E1E1E')
+        traffic_frame.pack(fill='x', padx=10, pady=5)
+        tk.Label(traffic_frame, text="Traffic seed:", fg='white', bg='#1E1E1E').pack(side='left')
+        self.seed_entry = tk.Entry(traffic_frame, width=8)
+        self.seed_entry.insert(0, "0")
+        self.seed_entry.pack(side='left', padx=5)
+        tk.Button(traffic_frame, text="Start Traffic", command=self.start_can_traffic, bg='#007ACC', fg='white').pack(side='left', padx=5)
+        tk.Button(traffic_frame, text="Stop Traffic", command=self.stop_can_traffic, bg='#FF5555', fg='white').pack(side='left', padx=5)
+        tk.Button(traffic_frame, text="Benchmark", command=self.benchmark_can_traffic, bg='#00AA00', fg='white').pack(side='left', padx=5)
+        
         self.scan_networks()
         self.scan_can_devices()
+        self.poll_can_bus(window)
+        return window
     
     def scan_networks(self):
         """Scan for WiFi networks"""
@@ -481,6 +3737,38 @@ class DeveloperTools:
                 device['id'], device['type'], device['status']
             ))
     
+    def apply_can_filter(self):
+        """Compile the filter rules typed in the CAN tab"""
+        try:
+            self.network_manager.can_filter = CanFilter.parse(self.filter_entry.get())
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid filter: {e}")
+    
+    def poll_can_bus(self, window):
+        """Show accepted frames and refresh per-ID statistics once a second"""
+        if not window.winfo_exists():
+            return
+        for message in self.network_manager.receive_can_messages():
+            self.can_console.insert(tk.END, f"[{message['timestamp']}] RECV <- {message['device']}: {message['message']}\n")
+        while self.can_notices:
+            self.can_console.insert(tk.END, self.can_notices.popleft())
+        self.can_console.delete('1.0', 'end-500l')
+        self.can_console.see(tk.END)
+        
+        self.stats_tree.delete(*self.stats_tree.get_children())
+        for row in self.network_manager.can_stats.snapshot():
+            self.stats_tree.insert('', 'end', values=(
+                f"0x{row['id']:03X}", row['count'], f"{row['rate']:.1f}",
+                f"{row['bus_load'] * 100:.2f}%", f"{row['age']:.1f}s"
+            ))
+        can_stats = self.network_manager.can_stats
+        channels = self.network_manager.get_can_channel_stats()
+        self.channel_label.config(text=f"Bus load {can_stats.bus_load * 100:.1f}% of {can_stats.bitrate // 1000} kbit/s   " + ("  ".join(
+            f"{name}: {stats['received']} recv, {stats['dropped']} dropped ({stats['policy']})"
+            for name, stats in channels.items()
+        ) or "Simulated bus"))
+        window.after(1000, self.poll_can_bus, window)
+    
     def send_can_message(self):
         """Send CAN bus message"""
         selection = self.devices_tree.selection()
@@ -505,6 +3793,88 @@ class DeveloperTools:
         
         self.can_console.see(tk.END)
     
+    def start_cyclic_message(self):
+        """Start (or update) a cyclic transmission for the selected device"""
+        selection = self.devices_tree.selection()
+        if not selection:
+            messagebox.showwarning("Warning", "Select a CAN device first!")
+            return
+        
+        device_id = self.devices_tree.item(selection[0])['values'][0]
+        message = self.message_entry.get().strip()
+        try:
+            period = float(self.period_entry.get()) / 1000
+        except ValueError:
+            period = 0
+        if not message or period <= 0:
+            messagebox.showwarning("Warning", "Enter a message and a period above 0 ms!")
+            return
+        
+        self.can_scheduler.start(device_id, device_id, message, period)
+        self.can_console.insert(tk.END, f"CYCLIC -> {device_id} every {period * 1000:g} ms: {message}\n")
+        self.can_console.see(tk.END)
+    
+    def _traffic_seed(self):
+        try:
+            return int(self.seed_entry.get(), 0)
+        except ValueError:
+            messagebox.showerror("Error", "Seed must be an integer!")
+            return None
+    
+    def start_can_traffic(self):
+        """Replay the seeded default traffic mix on a virtual bus attached as channel sim"""
+        seed = self._traffic_seed()
+        if seed is None:
+            return
+        self.stop_can_traffic()
+        bus = VirtualCanBus()
+        self.network_manager.add_can_channel("sim", bus.open())
+        self.traffic_generator = CanTrafficGenerator.default(seed)
+        self.traffic_generator.start_live(bus.open())
+        self.can_console.insert(tk.END, f"TRAFFIC started on sim with seed {seed}\n")
+        self.can_console.see(tk.END)
+    
+    def stop_can_traffic(self):
+        if self.traffic_generator:
+            self.traffic_generator.stop_live()
+            self.traffic_generator = None
+            self.network_manager.remove_can_channel("sim")
+    
+    def benchmark_can_traffic(self):
+        """Time ingest, filtering and decoding of one million seeded frames off the UI thread"""
+        seed = self._traffic_seed()
+        if seed is None:
+            return
+        # A private registry keeps a million benchmark frames out of the session's metrics
+        bench_manager = NetworkManager(registry=MetricsRegistry())
+        bench_manager.can_filter = self.network_manager.can_filter
+        self.can_console.insert(tk.END, f"BENCHMARK running with seed {seed}...\n")
+        
+        def run():
+            result = CanTrafficGenerator.default(seed).benchmark(bench_manager)
+            stages = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in result['stage_seconds'].items())
+            self.can_notices.append(
+                f"BENCHMARK {result['frames']} frames ({result['accepted']} accepted, {result['errors']} errors) "
+                f"at {result['frames_per_second']:,.0f} frames/s [{stages}] fingerprint {result['fingerprint']}\n")
+        
+        threading.Thread(target=run, daemon=True).start()
+    
+    def stop_cyclic_message(self):
+        """Stop the selected device's cyclic transmission and show its jitter"""
+        selection = self.devices_tree.selection()
+        if not selection:
+            messagebox.showwarning("Warning", "Select a CAN device first!")
+            return
+        
+        device_id = self.devices_tree.item(selection[0])['values'][0]
+        stats = self.can_scheduler.stop(device_id)
+        if stats:
+            self.can_console.insert(tk.END, (
+                f"STOPPED {device_id}: {stats['sent']} sent, {stats['skipped']} skipped, jitter "
+                f"p50 {stats['p50'] * 1000:.2f} ms / p99 {stats['p99'] * 1000:.2f} ms / max {stats['max'] * 1000:.2f} ms\n"
+            ))
+            self.can_console.see(tk.END)
+    
     def show_system_info(self):
         """Show system information"""
         window = tk.Toplevel(self.root)
@@ -528,21 +3898,159 @@ Screen: {self.root.winfo_screenwidth()}x{self.root.winfo_screenheight()}
         """User management tool"""
         window = tk.Toplevel(self.root)
         window.title("User Manager")
-        window.geometry("400x300")
+        window.geometry("600x400")
         window.configure(bg='#2D2D2D')
         
         tk.Label(window, text="User Manager", font=('Arial', 14, 'bold'), fg='white', bg='#2D2D2D').pack(pady=10)
         
-        user_list = tk.Listbox(window, bg='#2D2D2D', fg='white', font=('Arial', 11))
-        user_list.pack(fill='both', expand=True, padx=10, pady=5)
+        filter_var = tk.StringVar()
+        filter_entry = tk.Entry(window, textvariable=filter_var, font=('Arial', 11))
+        filter_entry.pack(fill='x', padx=10)
+        count_label = tk.Label(window, text="", fg='#AAAAAA', bg='#2D2D2D', font=('Arial', 9))
+        count_label.pack(anchor='w', padx=10)
+        
+        body = tk.Frame(window, bg='#2D2D2D')
+        body.pack(fill='both', expand=True, padx=10, pady=5)
+        
+        details = tk.Text(body, bg='#1A1A1A', fg='#00FF00', font=('Consolas', 9), width=30, state='disabled')
+        details.pack(side='right', fill='y', padx=(5, 0))
+        
+        index = UsernameIndex()
+        
+        def show_details(username):
+            account = self.account_manager.accounts.get(username)
+            if account is None:
+                return
+            lines = [
+                f"User: {username}",
+                f"Profile Type: {account['profile_type']}",
+                f"Created: {account['created_at']}",
+                f"Last Login: {account['last_login'] or 'Never'}",
+                "",
+                "Permissions:"
+            ]
+            lines.extend(f"  {name}: {'yes' if value else 'no'}" for name, value in account['permissions'].items())
+            details.config(state='normal')
+            details.delete('1.0', tk.END)
+            details.insert(tk.END, "\n".join(lines))
+            details.config(state='disabled')
+        
+        user_list = VirtualListbox(body, on_select=show_details, bg='#2D2D2D', fg='white', font=('Arial', 11))
+        user_list.pack(side='left', fill='both', expand=True)
+        
+        def apply_filter(*args):
+            started = time.perf_counter()
+            matches = index.search(filter_var.get().strip())
+            user_list.set_items(matches)
+            elapsed = (time.perf_counter() - started) * 1000
+            count_label.config(text=f"{len(matches)} of {len(index.names)} users ({elapsed:.1f} ms)")
+        
+        def refresh():
+            index.rebuild(self.account_manager.accounts.keys())
+            apply_filter()
+        
+        def accounts_changed(usernames):
+            for username in usernames:
+                if username in self.account_manager.accounts:
+                    index.add(username)
+                else:
+                    index.remove(username)
+            apply_filter()
+        
+        def view_details():
+            if user_list.selected is not None:
+                show_details(user_list.items[user_list.selected])
+        
+        filter_var.trace_add('write', apply_filter)
+        refresh()
+        self.account_manager.add_listener(accounts_changed)
+        window.bind('<Destroy>', lambda e: self.account_manager.remove_listener(accounts_changed)
+                    if e.widget is window else None)
+        filter_entry.focus()
+        
+        btn_frame = tk.Frame(window, bg='#2D2D2D')
+        btn_frame.pack(fill='x', padx=10, pady=10)
+        tk.Button(btn_frame, text="View Details", command=view_details, bg='#007ACC', fg='white').pack(side='left', padx=5)
+        tk.Button(btn_frame, text="Refresh", command=refresh, bg='#00AA00', fg='white').pack(side='left', padx=5)
+    
+    def show_metrics(self):
+        """Live view of the metrics registry in Prometheus text format"""
+        window = tk.Toplevel(self.root)
+        window.title("Metrics")
+        window.geometry("800x500")
+        window.configure(bg='#2D2D2D')
+        
+        metrics_text = tk.Text(window, bg='#1A1A1A', fg='#00FF00', font=('Consolas', 9), wrap='none')
+        metrics_text.pack(fill='both', expand=True, padx=10, pady=10)
+        
+        def refresh():
+            metrics_text.config(state='normal')
+            metrics_text.delete('1.0', tk.END)
+            if metrics.server:
+                host, port = metrics.server.server_address[:2]
+                metrics_text.insert(tk.END, f"# Served on http://{host}:{port}/metrics\n")
+            else:
+                metrics_text.insert(tk.END, "# Endpoint off. Press Serve, or start with RUSCAT_METRICS_PORT=<port>.\n")
+            metrics_text.insert(tk.END, metrics.exposition())
+            metrics_text.config(state='disabled')
+        
+        def serve():
+            success, message = metrics.serve(int(os.environ.get("RUSCAT_METRICS_PORT", 9464)))
+            if success:
+                messagebox.showinfo("Success", message)
+            else:
+                messagebox.showerror("Error", message)
+            refresh()
+        
+        btn_frame = tk.Frame(window, bg='#2D2D2D')
+        btn_frame.pack(fill='x', padx=10, pady=10)
+        tk.Button(btn_frame, text="Serve", command=serve, bg='#00AA00', fg='white').pack(side='left', padx=5)
+        tk.Button(btn_frame, text="Refresh", command=refresh, bg='#007ACC', fg='white').pack(side='left', padx=5)
+        refresh()
+    
+    def show_ui_profiler(self):
+        """Callback latency report from the Tk stall profiler"""
+        window = tk.Toplevel(self.root)
+        window.title("UI Profiler")
+        window.geometry("800x500")
+        window.configure(bg='#2D2D2D')
+        
+        report_text = tk.Text(window, bg='#1A1A1A', fg='#00FF00', font=('Consolas', 9), wrap='none')
+        report_text.pack(fill='both', expand=True, padx=10, pady=10)
+        
+        def refresh():
+            report_text.config(state='normal')
+            report_text.delete('1.0', tk.END)
+            if ui_profiler.installed:
+                report_text.insert(tk.END, ui_profiler.report())
+            else:
+                report_text.insert(tk.END, "Profiler is off. Start with RUSCAT_PROFILE_UI=1 to time every callback; Enable only times callbacks registered afterwards.\n")
+            report_text.config(state='disabled')
         
-        for username in self.account_manager.accounts.keys():
-            user_list.insert(tk.END, username)
+        def enable():
+            if not ui_profiler.installed and not messagebox.askyesno(
+                    "UI Profiler", "Only callbacks registered from now on will be timed; existing taskbar, "
+                    "desktop, menu and hotkey callbacks are not. Restart with RUSCAT_PROFILE_UI=1 to cover "
+                    "everything.\n\nEnable anyway?"):
+                return
+            ui_profiler.install()
+            refresh()
+        
+        def export():
+            success, message = ui_profiler.export_chrome_trace("ruscat_ui_trace.json")
+            if success:
+                messagebox.showinfo("Success", message)
+            else:
+                messagebox.showerror("Error", message)
         
         btn_frame = tk.Frame(window, bg='#2D2D2D')
         btn_frame.pack(fill='x', padx=10, pady=10)
-        tk.Button(btn_frame, text="View Details", bg='#007ACC', fg='white').pack(side='left', padx=5)
-        tk.Button(btn_frame, text="Refresh", bg='#00AA00', fg='white').pack(side='left', padx=5)
+        tk.Button(btn_frame, text="Enable", command=enable, bg='#00AA00', fg='white').pack(side='left', padx=5)
+        tk.Button(btn_frame, text="Refresh", command=refresh, bg='#007ACC', fg='white').pack(side='left', padx=5)
+        tk.Button(btn_frame, text="Export Trace", command=export, bg='#007ACC', fg='white').pack(side='left', padx=5)
+        
+        refresh()
+        return window
     
     def show_process_manager(self):
         """Simple process manager"""
@@ -562,12 +4070,19 @@ Screen: {self.root.winfo_screenwidth()}x{self.root.winfo_screenheight()}
 
 class RusCatOS:
     def __init__(self):
+        if os.environ.get("RUSCAT_PROFILE_UI"):
+            ui_profiler.install()
+        if os.environ.get("RUSCAT_METRICS_PORT"):
+            success, message = metrics.serve(int(os.environ["RUSCAT_METRICS_PORT"]))
+            print(("📈 " if success else "❌ ") + message)
+        
         self.root = tk.Tk()
         self.root.title("RusCat OS")
         self.root.configure(bg='#2D2D2D')
         
         # Initialize account manager first
         self.account_manager = AccountManager()
+        self.account_manager.watch_for_changes(self.root)
         
         # Show login screen
         if not self.show_login_screen():
@@ -691,6 +4206,8 @@ class RusCatOS:
     
     def setup_os(self):
         """Setup OS after successful login"""
+        setup_started = time.perf_counter()
+        
         # Start in fullscreen
         self.fullscreen = True
         self.root.attributes('-fullscreen', True)
@@ -701,14 +4218,22 @@ class RusCatOS:
         self.taskbar_height = 40
         
         # Initialize managers
-        self.power_manager = PowerManager()
+        self.shutdown_coordinator = ShutdownCoordinator()
+        self.power_manager = PowerManager(self.shutdown_coordinator)
         self.tournament_manager = TournamentManager(self.account_manager)
         self.mini_game = MiniGame(self.account_manager)
         self.dev_tools = DeveloperTools(self.account_manager, self.root)
-        
+        self.tool_launcher = ToolLauncher()
+        self.file_metadata_cache = LruCache(512)
+        self.window_opens = metrics.counter("window_opens_total", "Apps opened from the desktop, menus or a restored session", labels=('app',))
+        metrics.gauge("event_log_pending", "Events queued for the log writer").set_function(lambda: len(event_log.pending))
+        if self.account_manager.is_developer() and os.path.exists("ruscattool.py"):
+            self.tool_launcher.prewarm()
+
         # Bind keys
         self.root.bind('<F11>', self.toggle_fullscreen)
         self.root.bind('<Escape>', self.exit_fullscreen)
+        self.root.bind_all('<Control-space>', lambda e: self.show_search_launcher())
         
         self.setup_desktop()
         self.setup_taskbar()
@@ -716,7 +4241,29 @@ class RusCatOS:
         
         self.start_menu = None
         self.open_windows = []
+        self.setup_search()
+        
+        self.session = SessionManager(self.root, self.account_manager.current_user)
+        
+        def report_restored(count):
+            elapsed = (time.perf_counter() - setup_started) * 1000
+            event_log.log("session_restored", user=self.account_manager.current_user, windows=count, ms=round(elapsed, 1))
+            if count:
+                print(f"🗂️ Session restored: {count} windows in {elapsed:.0f} ms")
+            self.session.start()
+        
+        restored = self.session.restore(self.open_app, on_done=report_restored)
+        self.register_shutdown_hooks()
         
+        def report_interactive():
+            elapsed = (time.perf_counter() - setup_started) * 1000
+            mode = f"restoring {restored} windows" if restored else "no saved session"
+            event_log.log("time_to_interactive", user=self.account_manager.current_user, ms=round(elapsed, 1), restored=restored)
+            print(f"⏱️ Desktop interactive in {elapsed:.0f} ms ({mode})")
+        
+        self.root.after_idle(report_interactive)
+        
+        event_log.log("boot", user=self.account_manager.current_user, platform=sys.platform)
         print(f"👤 Logged in as: {self.account_manager.current_user}")
         print("🚀 RusCat OS Started Successfully!")
     
@@ -734,21 +4281,21 @@ class RusCatOS:
             self.toggle_fullscreen()
     
     def setup_desktop(self):
-        self.desktop = tk.Frame(self.root, bg='#2D2D2D')
+        self.desktop = DesktopCanvas(self.root, on_open=self.open_app, on_moved=self.save_icon_positions, bg='#2D2D2D')
         self.desktop.pack(fill='both', expand=True)
         
-        user_info = self.account_manager.get_current_user_info()
         welcome_text = f"RusCat OS\nWelcome, {self.account_manager.current_user}!\nPress F11 to toggle fullscreen"
         
-        title_label = tk.Label(
-            self.desktop, 
+        self.desktop.create_text(
+            self.screen_width // 2,
+            self.screen_height // 10,
             text=welcome_text,
             font=('Arial', 14, 'bold'),
-            fg='white',
-            bg='#2D2D2D',
-            justify='center'
+            fill='white',
+            justify='center',
+            tags=('title',)
         )
-        title_label.place(relx=0.5, rely=0.1, anchor='center')
+        self.desktop.bind('<Configure>', lambda e: self.desktop.coords('title', e.width // 2, e.height // 10))
         
     def setup_taskbar(self):
         self.taskbar = tk.Frame(self.root, bg='#3C3C3C', height=self.taskbar_height)
@@ -818,6 +4365,8 @@ class RusCatOS:
         dev_menu.add_command(label="User Manager", command=self.dev_tools.show_user_manager)
         dev_menu.add_command(label="Process Manager", command=self.dev_tools.show_process_manager)
         dev_menu.add_command(label="Network Manager", command=self.dev_tools.show_network_manager)
+        dev_menu.add_command(label="UI Profiler", command=self.dev_tools.show_ui_profiler)
+        dev_menu.add_command(label="Metrics", command=self.dev_tools.show_metrics)
         dev_menu.add_separator()
         dev_menu.add_command(label="Admin Panel", command=self.open_admin_panel)
         
@@ -830,7 +4379,9 @@ class RusCatOS:
         """Open the RusCat Admin Panel"""
         try:
             if os.path.exists("ruscattool.py"):
-                subprocess.Popen([sys.executable, "ruscattool.py"])
+                success, message = self.tool_launcher.launch("ruscattool.py")
+                if not success:
+                    messagebox.showerror("Error", message)
             else:
                 messagebox.showinfo("Info", "Admin panel file not found")
         except Exception as e:
@@ -848,8 +4399,22 @@ class RusCatOS:
         finally:
             power_menu.grab_release()
     
+    def register_shutdown_hooks(self):
+        """Teardown work for logout, restart and shutdown"""
+        coordinator = self.shutdown_coordinator
+        coordinator.register("session", self.session.save_now, priority=10, parallel=False)
+        coordinator.register("can scheduler", self.dev_tools.can_scheduler.stop_all, priority=10)
+        coordinator.register("can traffic", self.dev_tools.stop_can_traffic, priority=5)
+        coordinator.register("can channels", self.dev_tools.network_manager.close_can_channels, priority=10)
+        coordinator.register("tool launcher", self.tool_launcher.shutdown, priority=10)
+        coordinator.register("accounts", self.account_manager.save_accounts, priority=20, deadline=5.0)
+        coordinator.register("event log", event_log.flush, priority=90)
+        coordinator.register("metrics", metrics.stop, priority=90)
+    
     def logout(self):
         if messagebox.askyesno("Log Out", "Are you sure you want to log out?"):
+            self.account_manager.logout()
+            self.shutdown_coordinator.run()
             self.root.destroy()
     
     def toggle_start_menu(self):
@@ -888,19 +4453,26 @@ class RusCatOS:
         
         # Apps section
         apps = [
-            ("📝 Text Editor", self.open_text_editor),
-            ("🌐 Browser", self.open_browser),
-            ("🎮 Games", self.mini_game.number_guessing_game),
-            ("📊 Profile", self.show_user_profile),
+            ("📝 Text Editor", lambda: self.open_app("Text Editor")),
+            ("🌐 Browser", lambda: self.open_app("Browser")),
+            ("🎮 Games", lambda: self.open_app("Games")),
+            ("📊 Profile", lambda: self.open_app("Profile")),
+            ("🔍 Search (Ctrl+Space)", self.show_search_launcher),
         ]
         
         if self.account_manager.is_developer():
             apps.extend([
                 ("🔧 Dev Tools", self.show_dev_tools_menu),
-                ("🌐 Network", self.dev_tools.show_network_manager),
+                ("🌐 Network", lambda: self.open_app("Network")),
                 ("👑 Admin Panel", self.open_admin_panel)
             ])
         
+        if self.account_manager.has_permission('file_system'):
+            apps.append(("📁 File Manager", lambda: self.open_app("File Manager")))
+        
+        if self.account_manager.has_permission('system_tools'):
+            apps.append(("💻 Terminal", lambda: self.open_app("Terminal")))
+        
         for app_text, app_command in apps:
             btn = tk.Button(
                 menu_frame,
@@ -939,6 +4511,121 @@ class RusCatOS:
         
         self.start_menu.bind("<FocusOut>", lambda e: self.close_start_menu())
 
+    def setup_search(self):
+        """Build the launcher index; each source pushes its own updates afterwards"""
+        self.search_index = SearchIndex({'app': 3, 'file': 2, 'wifi': 1, 'can': 1})
+        self.search_window = None
+        self.recent_files = deque()
+        self.search_index.add_many('app', [(name, name, None) for name in self.desktop.order])
+        
+        if self.account_manager.has_permission('user_management'):
+            def accounts_changed(usernames):
+                for username in usernames:
+                    if username in self.account_manager.accounts:
+                        self.search_index.push('add', 'account', username, username, None)
+                    else:
+                        self.search_index.push('remove', 'account', username)
+            
+            self.search_index.add_many('account', [(name, name, None) for name in list(self.account_manager.accounts)])
+            self.account_manager.add_listener(accounts_changed)
+        
+        network_manager = self.dev_tools.network_manager
+        
+        def scan_results(kind, items):
+            if kind == 'wifi' and self.account_manager.has_permission('network_access'):
+                self.search_index.push('replace_source', 'wifi', [
+                    (network['ssid'], f"WiFi {network['ssid']}", None) for network in items
+                ])
+            elif kind == 'can' and self.account_manager.has_permission('can_bus_access'):
+                self.search_index.push('replace_source', 'can', [
+                    (device['id'], f"{device['id']} {device['type']}", None) for device in items
+                ])
+        
+        network_manager.add_listener(scan_results)
+        scan_results('wifi', network_manager.available_networks)
+        scan_results('can', network_manager.can_devices)
+    
+    def add_recent_file(self, path, limit=50):
+        if path in self.recent_files:
+            self.recent_files.remove(path)
+        self.recent_files.append(path)
+        self.search_index.push('add', 'file', path, os.path.basename(path), os.path.dirname(path))
+        while len(self.recent_files) > limit:
+            self.search_index.push('remove', 'file', self.recent_files.popleft())
+    
+    def show_search_launcher(self):
+        """Launcher that searches apps, accounts, recent files, WiFi networks and CAN devices"""
+        if self.search_window and self.search_window.winfo_exists():
+            self.search_window.lift()
+            self.search_window.focus_force()
+            return
+        
+        window = tk.Toplevel(self.root)
+        window.overrideredirect(True)
+        window.configure(bg='#4A4A4A')
+        width, height = 500, 320
+        window.geometry(f"{width}x{height}+{(self.screen_width - width) // 2}+{self.screen_height // 6}")
+        self.search_window = window
+        
+        query_var = tk.StringVar()
+        entry = tk.Entry(window, textvariable=query_var, font=('Arial', 14))
+        entry.pack(fill='x', padx=10, pady=10)
+        result_list = tk.Listbox(window, bg='#2D2D2D', fg='white', font=('Arial', 11), activestyle='none')
+        result_list.pack(fill='both', expand=True, padx=10)
+        status_label = tk.Label(window, text="", fg='#AAAAAA', bg='#4A4A4A', font=('Arial', 9))
+        status_label.pack(anchor='w', padx=10, pady=(0, 5))
+        
+        icons = {'app': "📱", 'account': "👤", 'file': "📄", 'wifi': "📶", 'can': "🔌"}
+        results = []
+        
+        def update_results(*args):
+            started = time.perf_counter()
+            results[:] = self.search_index.search(query_var.get())
+            elapsed = (time.perf_counter() - started) * 1000
+            result_list.delete(0, tk.END)
+            for item in results:
+                result_list.insert(tk.END, f"{icons.get(item['source'], '•')} {item['title']}   ({item['source']})")
+            if results:
+                result_list.selection_set(0)
+            status_label.config(text=f"{len(results)} results in {elapsed:.1f} ms from {len(self.search_index.items)} items")
+        
+        def move(step):
+            if not results:
+                return "break"
+            selection = result_list.curselection()
+            index = min(max((selection[0] if selection else 0) + step, 0), len(results) - 1)
+            result_list.selection_clear(0, tk.END)
+            result_list.selection_set(index)
+            result_list.see(index)
+            return "break"
+        
+        def run_selected(event=None):
+            selection = result_list.curselection()
+            if not selection:
+                return
+            item = results[selection[0]]
+            window.destroy()
+            self.open_search_result(item)
+        
+        query_var.trace_add('write', update_results)
+        entry.bind('<Return>', run_selected)
+        entry.bind('<Down>', lambda e: move(1))
+        entry.bind('<Up>', lambda e: move(-1))
+        window.bind('<Escape>', lambda e: window.destroy())
+        result_list.bind('<Double-Button-1>', run_selected)
+        entry.focus_force()
+    
+    def open_search_result(self, item):
+        source = item['source']
+        if source == 'app':
+            self.open_app(item['key'])
+        elif source == 'account':
+            self.dev_tools.show_user_manager()
+        elif source == 'file':
+            self.open_app("File Manager", path=item['payload'])
+        elif source in ('wifi', 'can'):
+            self.open_app("Network")
+    
     def show_user_profile(self):
         """Show user profile"""
         window = tk.Toplevel(self.root)
@@ -962,6 +4649,7 @@ class RusCatOS:
         info_text += f"Last Login: {user_info['last_login'] or 'Never'}\n"
         
         tk.Label(window, text=info_text, fg='white', bg='#4A4A4A', font=('Arial', 11)).pack(pady=20)
+        return window
 
     def create_sample_apps(self):
         apps = [
@@ -977,54 +4665,49 @@ class RusCatOS:
                 {"name": "Network", "x": 300, "y": 300}
             ])
         
+        if self.account_manager.has_permission('file_system'):
+            apps.append({"name": "File Manager", "x": 400, "y": 200})
+        
+        if self.account_manager.has_permission('system_tools'):
+            apps.append({"name": "Terminal", "x": 400, "y": 300})
+        
         for app in apps:
             self.create_app_icon(app["name"], app["x"], app["y"])
 
     def create_app_icon(self, name, x, y):
-        icon_frame = tk.Frame(
-            self.desktop,
-            bg='#4A4A4A',
-            width=80,
-            height=80,
-            relief='raised',
-            borderwidth=1
-        )
-        icon_frame.place(x=x, y=y)
-        
-        icon_label = tk.Label(
-            icon_frame,
-            text="📱",
-            font=('Arial', 20),
-            bg='#4A4A4A',
-            fg='white'
-        )
-        icon_label.pack(pady=5)
-        
-        name_label = tk.Label(
-            icon_frame,
-            text=name,
-            font=('Arial', 10),
-            bg='#4A4A4A',
-            fg='white'
-        )
-        name_label.pack()
-        
-        icon_frame.bind("<Double-Button-1>", lambda e: self.open_app(name))
+        user_info = self.account_manager.get_current_user_info() or {}
+        saved = user_info.get('settings', {}).get('icon_positions', {})
+        if name in saved:
+            x, y = saved[name]
+        self.desktop.add_icon(name, x, y)
 
-    def open_app(self, app_name):
+    def save_icon_positions(self, positions):
+        """Persist desktop icon positions for the current user"""
+        user_info = self.account_manager.get_current_user_info()
+        if user_info:
+            user_info.setdefault('settings', {})['icon_positions'] = positions
+            self.account_manager.save_accounts(self.account_manager.current_user)
+
+    def open_app(self, app_name, **state):
         app_functions = {
             "Text Editor": self.open_text_editor,
             "Browser": self.open_browser,
             "Games": self.mini_game.number_guessing_game,
             "Profile": self.show_user_profile,
             "Dev Tools": self.show_dev_tools_menu,
-            "Network": self.dev_tools.show_network_manager
+            "Network": self.dev_tools.show_network_manager,
+            "File Manager": self.open_file_manager,
+            "Terminal": self.open_terminal
         }
         
         if app_name in app_functions:
-            app_functions[app_name]()
+            self.window_opens.labels(app_name).inc()
+            window = app_functions[app_name](**state)
+            if window is not None:
+                self.session.track(app_name, window)
+            return window
 
-    def open_text_editor(self):
+    def open_text_editor(self, text=""):
         window = tk.Toplevel(self.root)
         window.title("Text Editor")
         window.geometry("400x300")
@@ -1032,6 +4715,35 @@ class RusCatOS:
         
         text_widget = tk.Text(window, bg='#2D2D2D', fg='white', font=('Arial', 11))
         text_widget.pack(fill='both', expand=True, padx=10, pady=10)
+        text_widget.insert('1.0', text)
+        
+        self.session.track("Text Editor", window, get_state=lambda: {'text': text_widget.get('1.0', 'end-1c')})
+        return window
+
+    def open_file_manager(self, path=None):
+        if not self.account_manager.has_permission('file_system'):
+            messagebox.showerror("Error", "File system access is not allowed for this account")
+            return None
+        
+        file_manager = FileManagerWindow(self.root, self.file_metadata_cache, path, on_file_opened=self.add_recent_file)
+        self.session.track("File Manager", file_manager.window, get_state=lambda: {'path': file_manager.path})
+        return file_manager.window
+
+    def open_terminal(self):
+        if not self.account_manager.has_permission('system_tools'):
+            messagebox.showerror("Error", "Terminal access is not allowed for this account")
+            return None
+        if pty is None:
+            messagebox.showerror("Error", "Terminal needs a POSIX pseudo-terminal")
+            return None
+        
+        settings = self.account_manager.get_current_user_info().get('settings', {})
+        try:
+            terminal = TerminalWindow(self.root, scrollback=settings.get('terminal_scrollback', 1000))
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to start shell: {e}")
+            return None
+        return terminal.window
 
     def open_browser(self):
         window = tk.Toplevel(self.root)
@@ -1041,6 +4753,7 @@ class RusCatOS:
         
         tk.Label(window, text="RusCat Browser", font=('Arial', 14, 'bold'), fg='white', bg='#4A4A4A').pack(pady=20)
         tk.Label(window, text="Browser functionality would be here", fg='white', bg='#4A4A4A').pack()
+        return window
 
     def close_start_menu(self):
         if self.start_menu:
@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ruscat_os
+
+
+@pytest.fixture(autouse=True, scope="session")
+def event_log_directory(tmp_path_factory):
+    """Keep the shared event log out of the working tree"""
+    ruscat_os.event_log.directory = str(tmp_path_factory.mktemp("ruscat_logs"))
+    yield
+    ruscat_os.event_log.flush()
@@ -0,0 +1,80 @@
+import multiprocessing
+import os
+
+import pytest
+
+import ruscat_os
+from ruscat_os import AccountManager
+
+pytestmark = pytest.mark.skipif(ruscat_os.fcntl is None, reason="needs POSIX flock")
+
+
+def _create_and_login(directory, worker, rounds, results):
+    os.chdir(directory)
+    manager = AccountManager()
+    ok = 0
+    for round_number in range(rounds):
+        username = f"user{worker}_{round_number}"
+        success, _ = manager.create_account(username, f"pass{worker}")
+        ok += success
+        success, _ = manager.login(username, f"pass{worker}")
+        ok += success
+        manager.accounts[username]['game_stats']['number_guessing']['plays'] += 1
+        ok += manager.save_accounts(username)
+    results.put((worker, ok))
+
+
+def _create_same_name(directory, worker, start, results):
+    os.chdir(directory)
+    manager = AccountManager()
+    start.wait()
+    success, _ = manager.create_account("alice", f"secret{worker}")
+    results.put((worker, success))
+
+
+def _run(target, directory, count, *args):
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    extra = [arg(context) if callable(arg) else arg for arg in args]
+    processes = [context.Process(target=target, args=(directory, worker, *extra, results)) for worker in range(count)]
+    for process in processes:
+        process.start()
+    outcomes = dict(results.get(timeout=60) for _ in processes)
+    for process in processes:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+    return outcomes
+
+
+def test_concurrent_logins_keep_every_account(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    AccountManager()
+    workers, rounds = 12, 8
+    outcomes = _run(_create_and_login, str(tmp_path), workers, rounds)
+    assert all(ok == rounds * 3 for ok in outcomes.values())
+
+    manager = AccountManager()
+    for worker in range(workers):
+        for round_number in range(rounds):
+            username = f"user{worker}_{round_number}"
+            assert manager.accounts[username]['last_login'] is not None
+            assert manager.accounts[username]['game_stats']['number_guessing']['plays'] == 1
+            assert manager.login(username, f"pass{worker}")[0]
+    assert len(manager.accounts) == workers * rounds + 1
+
+
+def test_duplicate_create_in_two_instances_is_rejected(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    first, second = AccountManager(), AccountManager()
+    assert first.create_account("alice", "aaaa1")[0]
+    assert second.create_account("alice", "bbbb2") == (False, "Username already exists!")
+    assert AccountManager().login("alice", "aaaa1")[0]
+
+
+def test_concurrent_duplicate_create_has_one_winner(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    AccountManager()
+    outcomes = _run(_create_same_name, str(tmp_path), 8, lambda context: context.Barrier(8))
+    winners = [worker for worker, success in outcomes.items() if success]
+    assert len(winners) == 1
+    assert AccountManager().login("alice", f"secret{winners[0]}")[0]
@@ -0,0 +1,128 @@
+import threading
+import time
+
+import pytest
+
+from ruscat_os import (BoundedFrameQueue, CanChannel, CanTrafficGenerator, MetricsRegistry, NetworkManager,
+                       VirtualCanBus, metrics)
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def network_manager(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manager = NetworkManager()
+    yield manager
+    manager.close_can_channels()
+
+
+def test_drop_oldest_keeps_newest_frames():
+    queue = BoundedFrameQueue(capacity=3, policy='drop-oldest')
+    results = [queue.put(n) for n in range(5)]
+    assert results == [True, True, True, False, False]
+    assert queue.dropped == 2
+    assert queue.drain() == [2, 3, 4]
+
+
+def test_drop_newest_keeps_oldest_frames():
+    queue = BoundedFrameQueue(capacity=3, policy='drop-newest')
+    for n in range(5):
+        queue.put(n)
+    assert queue.dropped == 2
+    assert queue.drain() == [0, 1, 2]
+
+
+def test_block_waits_for_room_then_gives_up_at_timeout():
+    queue = BoundedFrameQueue(capacity=2, policy='block')
+    queue.put(0)
+    queue.put(1)
+    assert not queue.put(2, timeout=0.05)
+    assert queue.dropped == 1
+
+    threading.Timer(0.05, queue.drain, args=(1,)).start()
+    assert queue.put(3, timeout=2)
+    assert queue.dropped == 1
+    assert queue.drain() == [1, 3]
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        BoundedFrameQueue(policy='drop-everything')
+
+
+def test_channels_merge_in_timestamp_order_across_reads(network_manager):
+    busy_bus, quiet_bus = VirtualCanBus(), VirtualCanBus()
+    busy, quiet = busy_bus.open(), quiet_bus.open()
+    # Attach channels without the consumer thread so the queues fill, then merge them in small reads
+    network_manager.can_channels["busy"] = CanChannel("busy", busy_bus.open())
+    network_manager.can_channels["quiet"] = CanChannel("quiet", quiet_bus.open())
+    channels = network_manager.can_channels
+    for n in range(300):
+        busy.send(0x100, bytes([n % 256]) * 8)
+        if n % 10 == 0:
+            _wait_for(lambda: channels["busy"].received == n + 1)
+            quiet.send(0x200, bytes([n % 256]) * 8)
+    _wait_for(lambda: channels["busy"].received == 300 and channels["quiet"].received == 30)
+
+    frames = []
+    for _ in range(20):
+        frames.extend(network_manager.read_can_channels(limit=50))
+    timestamps = [frame[0] for frame in frames]
+    assert timestamps == sorted(timestamps)
+    assert len(frames) == 330
+
+
+def test_consumer_thread_feeds_stats_listeners_and_recent_buffer(network_manager):
+    bus = VirtualCanBus()
+    sender = bus.open()
+    delivered = []
+    network_manager.add_can_listener(delivered.extend)
+    network_manager.add_can_channel("a", bus.open())
+    network_manager.add_can_channel("b", bus.open())
+    for n in range(5000):
+        sender.send(0x100 + n % 3, bytes(8))
+    _wait_for(lambda: len(delivered) == 10000)
+
+    timestamps = [frame[0] for frame in delivered]
+    assert timestamps == sorted(timestamps)
+    assert sum(row['count'] for row in network_manager.can_stats.snapshot()) == 10000
+    assert len(network_manager.receive_can_messages()) == network_manager.can_recent.maxlen
+    assert network_manager.receive_can_messages() == []
+
+
+def test_slow_listener_does_not_stall_readers(network_manager):
+    bus = VirtualCanBus()
+    sender = bus.open()
+    release = threading.Event()
+    network_manager.add_can_listener(lambda frames: release.wait(5))
+    network_manager.add_can_channel("slow", bus.open(), capacity=10, policy='drop-oldest')
+    channel = network_manager.can_channels["slow"]
+    sender.send(0x200, bytes(8))
+    _wait_for(lambda: channel.received == 1 and not channel.queue.frames)
+
+    for n in range(1000):
+        sender.send(0x200, bytes(8))
+    _wait_for(lambda: channel.received == 1001)
+    stats = network_manager.get_can_channel_stats()["slow"]
+    assert stats['queued'] == 10
+    assert stats['dropped'] == 990
+    release.set()
+
+
+def test_benchmark_counts_into_its_own_registry():
+    def received(registry):
+        return sum(value for key, value in registry.snapshot().items() if key.endswith("can_frames_received_total"))
+
+    before = received(metrics)
+    private = MetricsRegistry()
+    result = CanTrafficGenerator.default(7).benchmark(NetworkManager(registry=private), frames=2000)
+    assert result['frames'] >= 2000
+    assert received(private) == result['frames']
+    assert received(metrics) == before
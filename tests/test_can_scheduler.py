@@ -0,0 +1,64 @@
+import threading
+import time
+
+import pytest
+
+from ruscat_os import CanTransmitScheduler
+
+
+class RecordingNetwork:
+    def __init__(self):
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def send_can_message(self, device_id, message):
+        with self.lock:
+            self.sent.append((time.monotonic(), device_id, message))
+        return True, "sent"
+
+    def count(self, device_id):
+        with self.lock:
+            return sum(1 for _, device, _ in self.sent if device == device_id)
+
+
+@pytest.fixture
+def scheduler():
+    network = RecordingNetwork()
+    scheduler = CanTransmitScheduler(network)
+    yield scheduler, network
+    scheduler.stop_all()
+
+
+def test_restarted_job_runs_on_a_single_schedule(scheduler):
+    scheduler, network = scheduler
+    scheduler.start("A", "CAN_001", "aa", 0.01)
+    scheduler.start("B", "CAN_002", "bb", 0.2)
+    time.sleep(0.05)
+    scheduler.stop("B")
+    scheduler.start("B", "CAN_002", "bb", 0.2)
+    before = network.count("CAN_002")
+    time.sleep(1.0)
+    sent = network.count("CAN_002") - before
+    assert 4 <= sent <= 6
+    with scheduler.condition:
+        live = [entry for entry in scheduler.heap
+                if entry[2] == "B" and scheduler.jobs["B"]['generation'] == entry[3]]
+    assert len(live) == 1
+
+
+def test_non_positive_period_is_rejected(scheduler):
+    scheduler, _ = scheduler
+    with pytest.raises(ValueError):
+        scheduler.start("A", "CAN_001", "aa", 0)
+    assert scheduler.thread is None
+
+
+def test_update_payload_keeps_the_schedule(scheduler):
+    scheduler, network = scheduler
+    scheduler.start("A", "CAN_001", "aa", 0.02)
+    time.sleep(0.1)
+    assert scheduler.update_payload("A", "bb")
+    time.sleep(0.1)
+    stats = scheduler.stop("A")
+    assert stats['sent'] >= 5
+    assert network.sent[-1][2] == "bb"
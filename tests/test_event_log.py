@@ -0,0 +1,55 @@
+import os
+import time
+
+from ruscat_os import EventLog
+
+
+def test_failed_write_is_counted_and_the_writer_recovers(tmp_path):
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_text("")
+    log = EventLog(directory=str(blocker))
+    log.pending.append((time.time(), "login", "alice", {}))
+    log.flush()
+    assert (log.write_errors, log.written, len(log.pending)) == (1, 0, 1)
+
+    log.directory = str(tmp_path / "logs")
+    log.pending.append((time.time(), "login", "alice", {}))
+    log.flush()
+    assert log.written == 2
+    assert [record['event'] for record in log.events_for_user("alice")] == ["login", "login"]
+
+
+def test_events_from_earlier_runs_and_other_instances_are_found(tmp_path):
+    directory = str(tmp_path)
+    earlier = EventLog(directory=directory)
+    earlier.pending.append((time.time(), "login", "alice", {'note': "café\r\n"}))
+    earlier.flush()
+    earlier.current_file.close()
+
+    current = EventLog(directory=directory)
+    other = EventLog(directory=directory)
+    current.pending.append((time.time(), "logout", "alice", {}))
+    current.flush()
+    other.pending.append((time.time(), "password_changed", "alice", {}))
+    other.flush()
+
+    events = current.events_for_user("alice")
+    assert [record['event'] for record in events] == ["login", "logout", "password_changed"]
+    assert events[0]['note'] == "café\r\n"
+
+
+def test_rotation_leaves_other_instances_recent_files(tmp_path):
+    directory = str(tmp_path)
+    other = EventLog(directory=directory)
+    other.pending.append((time.time(), "login", "bob", {}))
+    other.flush()
+
+    log = EventLog(directory=directory, max_bytes=1, max_files=1)
+    for index in range(3):
+        log.pending.append((time.time(), "tick", "alice", {'index': index}))
+        log.flush()
+
+    remaining = sorted(os.listdir(directory))
+    assert os.path.basename(other.current_path) in remaining
+    assert len(remaining) == 2
+    assert [record['event'] for record in log.events_for_user("bob")] == ["login"]
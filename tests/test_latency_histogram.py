@@ -0,0 +1,19 @@
+from ruscat_os import LatencyHistogram
+
+
+def test_percentiles_are_within_one_eighth_of_an_octave():
+    histogram = LatencyHistogram()
+    for micros in range(1, 2001):
+        histogram.record(micros / 1000000)
+    for percent in range(5, 100, 5):
+        exact = 2000 * percent / 100
+        reported = histogram.percentile(percent) * 1000000
+        assert exact <= reported <= exact * 1.125 + 1
+
+
+def test_small_values_are_exact():
+    histogram = LatencyHistogram()
+    for micros in (1, 3, 7, 12):
+        histogram.record(micros / 1000000)
+    assert histogram.percentile(50) * 1000000 == 4
+    assert histogram.summary()['count'] == 4
@@ -0,0 +1,48 @@
+from ruscat_os import SearchIndex
+
+
+def test_repeated_key_in_one_batch_keeps_the_last_entry():
+    index = SearchIndex()
+    index.add_many('x', [("k", "alpha zulu", None), ("k", "bravo", 1)])
+    assert [(item['key'], item['payload']) for item in index.search("bravo")] == [("k", 1)]
+    assert index.search("alpha") == []
+    assert index.search("zulu") == []
+
+
+def test_update_and_remove_through_pending_queue():
+    index = SearchIndex()
+    index.add_many('app', [("Terminal", "Terminal", None), ("Text Editor", "Text Editor", None)])
+    index.push('add', 'file', "/tmp/notes.txt", "notes.txt", "/tmp")
+    assert [item['title'] for item in index.search("note")] == ["notes.txt"]
+    index.push('remove', 'file', "/tmp/notes.txt")
+    assert index.search("note") == []
+    assert {item['title'] for item in index.search("te")} == {"Terminal", "Text Editor"}
+
+
+def test_fuzzy_match_is_found_among_many_similar_tokens():
+    index = SearchIndex()
+    index.add_many('account', [(f"user{n}", f"user{n}", None) for n in range(50000)])
+    titles = [item['title'] for item in index.search("usr49")]
+    assert titles and all(title.startswith("user49") for title in titles)
+
+
+def test_every_word_must_match_when_a_common_word_drives_the_lookup():
+    index = SearchIndex()
+    words = ["engine", "notes", "report", "brake"]
+    index.add_many('file', [(n, f"{words[n % 4]}_{words[(n // 4) % 4]}_{n}.txt", None) for n in range(20000)])
+    results = index.search("notse rep")
+    assert len(results) == 10
+    for item in results:
+        assert "notes" in item['tokens'] and "report" in item['tokens']
+
+
+def test_small_sources_survive_the_candidate_cap():
+    class TinyIndex(SearchIndex):
+        CANDIDATE_LIMIT = 5
+        SCAN_LIMIT = 5
+
+    index = TinyIndex({'app': 3})
+    index.add_many('file', [(n, f"terminal log {n}", None) for n in range(1000)])
+    index.add_many('file', [(f"x{n}", f"terminal trace {n}", None) for n in range(1000)])
+    index.add('app', "Terminal", "Terminal")
+    assert index.search("term")[0]['title'] == "Terminal"
@@ -0,0 +1,77 @@
+import threading
+import time
+
+from ruscat_os import PowerManager, ShutdownCoordinator
+
+
+def _coordinator():
+    commands = []
+    return ShutdownCoordinator(system_command=lambda command: commands.append(command) or 0), commands
+
+
+def test_power_off_runs_hooks_by_priority_then_the_command():
+    coordinator, commands = _coordinator()
+    order = []
+    coordinator.register("late", lambda: order.append("late"), priority=90)
+    coordinator.register("early", lambda: order.append("early"), priority=10, parallel=False)
+    coordinator.register("middle", lambda: order.append(("middle", commands[:])), priority=50)
+
+    assert coordinator.power_off("shutdown -h now") == 0
+    assert order == ["early", ("middle", []), "late"]
+    assert commands == ["shutdown -h now"]
+    assert [result['status'] for result in coordinator.last_report] == ['ok', 'ok', 'ok']
+
+
+def test_hooks_sharing_a_priority_run_in_parallel():
+    coordinator, _ = _coordinator()
+    barrier = threading.Barrier(3, timeout=2)
+    for name in ("a", "b", "c"):
+        coordinator.register(name, barrier.wait, priority=10)
+
+    started = time.perf_counter()
+    report = coordinator.run()
+    assert [result['status'] for result in report] == ['ok', 'ok', 'ok']
+    assert time.perf_counter() - started < 1.5
+
+
+def test_hung_hook_is_abandoned_at_its_deadline():
+    coordinator, commands = _coordinator()
+    release = threading.Event()
+    ran_after = []
+    coordinator.register("hung", release.wait, priority=10, deadline=0.1)
+    coordinator.register("next", lambda: ran_after.append(True), priority=20)
+
+    started = time.perf_counter()
+    coordinator.power_off("reboot")
+    elapsed = time.perf_counter() - started
+    release.set()
+
+    hung, following = coordinator.last_report
+    assert hung['status'] == 'abandoned'
+    assert 0.1 <= elapsed < 1.0
+    assert following['status'] == 'ok' and ran_after == [True]
+    assert commands == ["reboot"]
+
+
+def test_hook_errors_are_reported_without_stopping_teardown():
+    coordinator, commands = _coordinator()
+
+    def broken():
+        raise RuntimeError("disk gone")
+
+    coordinator.register("broken", broken, priority=10)
+    coordinator.register("inline", broken, priority=10, parallel=False)
+    coordinator.register("after", lambda: None, priority=20)
+
+    coordinator.power_off("shutdown /s /t 0")
+    statuses = {result['name']: result for result in coordinator.last_report}
+    assert statuses['broken']['status'] == 'error'
+    assert statuses['broken']['error'] == "disk gone"
+    assert statuses['inline']['status'] == 'error'
+    assert statuses['after']['status'] == 'ok'
+    assert commands == ["shutdown /s /t 0"]
+
+
+def test_power_command_names_a_platform_command():
+    assert PowerManager.power_command('shutdown') in ("shutdown /s /t 0", "shutdown -h now", None)
+    assert PowerManager.power_command('restart') in ("shutdown /r /t 0", "reboot", "shutdown -r now", None)
@@ -0,0 +1,36 @@
+import threading
+import time
+
+from ruscat_os import TkStallProfiler
+
+
+def test_late_watchdog_samples_are_not_leaked():
+    profiler = TkStallProfiler(stall_thresholds=(0.0, 0.0))
+    done = threading.Event()
+
+    def sample():
+        while not done.is_set():
+            profiler._sample()
+
+    sampler = threading.Thread(target=sample)
+    sampler.start()
+    try:
+        for _ in range(2000):
+            profiler.measure("tick", lambda: None)
+    finally:
+        done.set()
+        sampler.join()
+    assert profiler.active == []
+    assert profiler.samples == {}
+
+
+def test_overrunning_callback_keeps_its_stacks():
+    profiler = TkStallProfiler(stall_thresholds=(0.01, 0.5))
+    sampler = threading.Timer(0.03, profiler._sample)
+    sampler.start()
+    profiler.measure("slow", time.sleep, 0.06)
+    sampler.join()
+    stall = profiler.stalls[-1]
+    assert (stall['name'], stall['severity']) == ("slow", 'stall')
+    assert len(stall['stacks']) == 1 and "test_ui_profiler" in stall['stacks'][0]['stack']
+    assert profiler.samples == {}
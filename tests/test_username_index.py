@@ -0,0 +1,20 @@
+from ruscat_os import UsernameIndex
+
+
+def test_search_ranks_prefix_matches_first():
+    index = UsernameIndex(["maxim", "admin", "Administrator", "sysadmin", "guest"])
+    assert index.search("adm") == ["admin", "Administrator", "sysadmin"]
+    assert index.search("admi") == ["admin", "Administrator", "sysadmin"]
+    assert index.search("min") == ["admin", "Administrator", "sysadmin"]
+
+
+def test_incremental_updates_are_seen_by_a_narrowing_search():
+    index = UsernameIndex(["alice", "bob"])
+    assert index.search("al") == ["alice"]
+    index.add("alan")
+    index.add("alan")
+    index.add("Alan")
+    assert sorted(index.search("ala")) == ["Alan", "alan"]
+    index.remove("alice")
+    assert sorted(index.search("al")) == ["Alan", "alan"]
+    assert index.prefix("B") == ["bob"]